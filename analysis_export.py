@@ -0,0 +1,162 @@
+import json
+import os
+import re
+import time
+import numpy as np
+import pyarrow as pa
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+
+from config import ANALYSIS_EXPORT_DIR, ANALYSIS_EXPORT_FORMAT, ANALYSIS_EXPORT_BATCH_ROWS, LABEL_MAPPING
+
+EXPORT_EXTENSIONS = {'parquet': '.parquet', 'arrow': '.arrow'}
+
+# One row per classified sentence. message_id / parent_message_id are -1 when unknown
+# (e.g. comments fetched for a single post only keep their text).
+EXPORT_SCHEMA = pa.schema(
+    [
+        ('message_id', pa.int64()),
+        ('parent_message_id', pa.int64()),
+        ('text_index', pa.int64()),
+        ('char_offset', pa.int32()),
+        ('char_length', pa.int32()),
+        ('sentence', pa.string()),
+        ('processed_text', pa.string()),
+        ('label', pa.dictionary(pa.int8(), pa.string())),
+    ] + [(f"prob_{LABEL_MAPPING[label_id]}", pa.float32()) for label_id in sorted(LABEL_MAPPING)]
+)
+
+
+def make_export_path(url_info, export_dir=ANALYSIS_EXPORT_DIR, export_format=ANALYSIS_EXPORT_FORMAT):
+    """Builds a unique file name from the analysis time and the channel identifier (and post id)."""
+    name = str(url_info.get('identifier', 'unknown'))
+    if url_info.get('message_id') is not None:
+        name += f"_{url_info['message_id']}"
+    name = re.sub(r'[^\w-]', '_', name)
+    return os.path.join(export_dir, f"{time.strftime('%Y%m%d-%H%M%S')}_{time.time_ns() % 10**6:06d}_{name}{EXPORT_EXTENSIONS[export_format]}")
+
+
+class AnalysisExportWriter:
+    """
+    Writes per-sentence predictions of one analysis to a Parquet or Arrow IPC file, one row group /
+    record batch per write_batch call, so rows reach the file as soon as a batch is done.
+    Analysis-level information (URL, time, model) is stored in the file's schema metadata.
+    """
+
+    def __init__(self, path, metadata=None, export_format=ANALYSIS_EXPORT_FORMAT):
+        if export_format not in EXPORT_EXTENSIONS:
+            raise ValueError(f"Unknown export format '{export_format}'. Available: {', '.join(EXPORT_EXTENSIONS)}")
+        export_dir = os.path.dirname(path)
+        if export_dir:
+            os.makedirs(export_dir, exist_ok=True)
+        self.path = path
+        self.rows_written = 0
+        schema = EXPORT_SCHEMA.with_metadata({'analysis': json.dumps(metadata or {}, ensure_ascii=False, default=str)})
+        if export_format == 'parquet':
+            self._writer = pq.ParquetWriter(path, schema)
+        else:
+            self._sink = pa.OSFile(path, 'wb')
+            self._writer = ipc.new_file(self._sink, schema)
+        self._schema = schema
+        self._label_names = pa.array([LABEL_MAPPING[label_id] for label_id in sorted(LABEL_MAPPING)], type=pa.string())
+        self._label_positions = {label_id: position for position, label_id in enumerate(sorted(LABEL_MAPPING))}
+
+    def write_batch(self, message_ids, parent_message_ids, text_indices, char_offsets, char_lengths,
+                    sentences, processed_sentences, label_ids, probabilities):
+        """Appends one batch of sentences; probabilities columns follow the order of sorted(LABEL_MAPPING)."""
+        label_indices = np.fromiter((self._label_positions[int(label_id)] for label_id in label_ids), dtype=np.int8, count=len(label_ids))
+        columns = [
+            pa.array(message_ids, type=pa.int64()),
+            pa.array(parent_message_ids, type=pa.int64()),
+            pa.array(text_indices, type=pa.int64()),
+            pa.array(char_offsets, type=pa.int32()),
+            pa.array(char_lengths, type=pa.int32()),
+            pa.array(sentences, type=pa.string()),
+            pa.array(processed_sentences, type=pa.string()),
+            pa.DictionaryArray.from_arrays(pa.array(label_indices, type=pa.int8()), self._label_names),
+        ] + [pa.array(probabilities[:, i], type=pa.float32()) for i in range(probabilities.shape[1])]
+        self._writer.write_batch(pa.record_batch(columns, schema=self._schema))
+        self.rows_written += len(label_ids)
+
+    def close(self):
+        self._writer.close()
+        if hasattr(self, '_sink'):
+            self._sink.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _sentence_offsets(texts, text_indices, sentences):
+    """Character offset of every sentence within its source text (sentences of a text come in order)."""
+    offsets = np.empty(len(sentences), dtype=np.int32)
+    cursor_text, cursor, source_text = -1, 0, ''
+    for i, (text_idx, sentence) in enumerate(zip(text_indices, sentences)):
+        if text_idx != cursor_text:
+            cursor_text, cursor, source_text = text_idx, 0, texts[text_idx]
+        position = source_text.find(sentence, cursor)
+        offsets[i] = position
+        if position >= 0:
+            cursor = position + len(sentence)
+    return offsets
+
+
+def write_sentence_predictions(writer, texts, text_message_ids, text_parent_message_ids, text_indices,
+                               sentences, processed_sentences, label_ids, probabilities, batch_rows=ANALYSIS_EXPORT_BATCH_ROWS):
+    """
+    Appends classified sentences to an open AnalysisExportWriter, in row groups of at most batch_rows.
+    texts is the indexable source (a list of texts or a ScrapedCorpus) that text_indices point into;
+    text_message_ids / text_parent_message_ids are int64 arrays with the Telegram ids of each source text.
+    """
+    text_indices = np.asarray(text_indices, dtype=np.int64)
+    for start in range(0, len(sentences), batch_rows):
+        end = min(start + batch_rows, len(sentences))
+        batch_text_indices = text_indices[start:end]
+        batch_sentences = sentences[start:end]
+        writer.write_batch(
+            message_ids=text_message_ids[batch_text_indices],
+            parent_message_ids=text_parent_message_ids[batch_text_indices],
+            text_indices=batch_text_indices,
+            char_offsets=_sentence_offsets(texts, batch_text_indices, batch_sentences),
+            char_lengths=np.fromiter((len(s) for s in batch_sentences), dtype=np.int32, count=end - start),
+            sentences=batch_sentences,
+            processed_sentences=processed_sentences[start:end],
+            label_ids=label_ids[start:end],
+            probabilities=probabilities[start:end],
+        )
+
+
+def export_sentence_predictions(path, metadata, texts, text_message_ids, text_parent_message_ids, text_indices,
+                                sentences, processed_sentences, label_ids, probabilities,
+                                export_format=ANALYSIS_EXPORT_FORMAT, batch_rows=ANALYSIS_EXPORT_BATCH_ROWS):
+    """
+    Writes all classified sentences of one analysis to a new export file (see write_sentence_predictions).
+    Returns the number of rows written.
+    """
+    with AnalysisExportWriter(path, metadata, export_format) as writer:
+        write_sentence_predictions(writer, texts, text_message_ids, text_parent_message_ids, text_indices,
+                                   sentences, processed_sentences, label_ids, probabilities, batch_rows)
+        return writer.rows_written
+
+
+def load_analysis_export(path, columns=None):
+    """
+    Loads an exported analysis as a pyarrow Table without copying it into memory: Arrow IPC files are
+    memory-mapped directly and Parquet files are read through a memory map.
+    The analysis metadata is available as json.loads(table.schema.metadata[b'analysis']).
+    """
+    if path.endswith(EXPORT_EXTENSIONS['arrow']):
+        table = ipc.open_file(pa.memory_map(path, 'r')).read_all()
+        return table.select(columns) if columns else table
+    return pq.read_table(path, columns=columns, memory_map=True)
+
+
+def list_analysis_exports(export_dir=ANALYSIS_EXPORT_DIR):
+    """Returns the export files in export_dir, oldest first."""
+    if not os.path.isdir(export_dir):
+        return []
+    extensions = tuple(EXPORT_EXTENSIONS.values())
+    return sorted(os.path.join(export_dir, name) for name in os.listdir(export_dir) if name.endswith(extensions))
@@ -0,0 +1,672 @@
+import asyncio
+import sys
+import threading
+import time
+from collections import Counter
+import numpy as np
+
+from config import (
+    LABEL_MAPPING, NEAR_DUPLICATE_COLLAPSE_ENABLED, NEAR_DUPLICATE_THRESHOLD,
+    ANALYSIS_EXPORT_ENABLED, SAMPLING_BLOCK_MESSAGES, SAMPLING_BLOCKS_PER_ROUND, SAMPLING_MIN_BLOCKS, SAMPLING_MAX_MESSAGES,
+    TREND_MESSAGE_LIMIT, SENTENCE_SINK_BATCH_SENTENCES,
+)
+from amharic_preprocessing import preprocess_amharic_text, tokenize_amharic_sentences
+from near_duplicates import cluster_near_duplicates
+from channel_sampling import BlockProportionEstimator
+from trend_aggregation import TrendAggregator
+from scraped_corpus import ScrapedCorpus
+from analysis_export import make_export_path, AnalysisExportWriter, write_sentence_predictions
+from result_cache import make_cache_key
+from telegram_scraper import (
+    get_telegram_comments_for_message,
+    get_channel_or_group_content,
+    get_multiple_channels_content,
+    sample_channel_or_group_content,
+)
+
+# Order in which labels are summarised and sampled on the results page.
+ORDERED_LABELS = ['hate', 'offensive', 'normal']
+# Labels whose estimated proportion must reach the requested interval width before sampling stops.
+ESTIMATED_LABELS = ['hate', 'offensive']
+SAMPLES_PER_LABEL = 3
+SAMPLE_MAX_CHARS = 200
+DUPLICATE_CLUSTERS_REPORTED = 5
+
+
+class AnalysisService:
+    """
+    Scrapes Telegram content, classifies it sentence by sentence and builds the
+    summary rendered by results.html. The actual model is hidden behind an
+    InferenceBackend (see inference.py). The backend can be replaced while serving (see
+    swap_backend); each analysis reads self.backend once and uses that backend throughout.
+    An optional ShadowEvaluator (see shadow_evaluation.py) compares a candidate model on sampled batches,
+    and an optional TrendStore (see trend_store.py) keeps the daily label counts behind analyze_trends.
+    """
+
+    def __init__(self, backend, result_cache=None, collapse_near_duplicates=NEAR_DUPLICATE_COLLAPSE_ENABLED,
+                 near_duplicate_threshold=NEAR_DUPLICATE_THRESHOLD, export_enabled=ANALYSIS_EXPORT_ENABLED, shadow=None,
+                 trend_store=None):
+        self.backend = backend
+        self.shadow = shadow
+        self.trend_store = trend_store
+        self.result_cache = result_cache
+        self.collapse_near_duplicates = collapse_near_duplicates
+        self.near_duplicate_threshold = near_duplicate_threshold
+        self.export_enabled = export_enabled
+        self._refreshing_keys = set()
+        self._refresh_lock = threading.Lock()
+
+    def swap_backend(self, backend):
+        """Atomically replaces the inference backend and returns the previous one."""
+        previous_backend, self.backend = self.backend, backend
+        return previous_backend
+
+    def classify_sentences(self, texts_to_analyze, sentence_sink=None, backend=None, with_probabilities=None):
+        """
+        Sentence-tokenizes a list of texts, preprocesses each sentence, and classifies them
+        with backend (the current self.backend by default).
+        If sentence_sink is given, sentences are classified in batches of SENTENCE_SINK_BATCH_SENTENCES and
+        the sink is called after each batch with its (source text indices, original sentences, preprocessed
+        sentences, label ids, class probabilities), so no batch's probabilities outlive it. Near-duplicate
+        clusters are then found within each batch.
+        Probabilities are computed only if with_probabilities (by default: when there is a sink), else None.
+        Returns:
+            tuple: (list of predicted label strings, list of original sentences that were classified,
+                    near-duplicate report, see describe_duplicate_clusters)
+        """
+        if not texts_to_analyze:
+            return [], [], {}
+
+        sentences_for_classification, original_sentences_passed_filter, source_text_indices = self.prepare_sentences(texts_to_analyze)
+
+        if not sentences_for_classification:
+            return [], [], {}
+
+        backend = backend or self.backend
+        if with_probabilities is None:
+            with_probabilities = sentence_sink is not None
+        n_sentences = len(sentences_for_classification)
+        batch_size = SENTENCE_SINK_BATCH_SENTENCES if sentence_sink is not None else n_sentences
+        try:
+            predicted_label_strings, classified_sentences, duplicate_clusters = [], [], []
+            for start in range(0, n_sentences, batch_size):
+                end = min(start + batch_size, n_sentences)
+                batch_sentences = sentences_for_classification[start:end]
+                cpu_start = time.thread_time()
+                predictions, batch_clusters, probabilities = self.predict_sentences(
+                    batch_sentences, with_probabilities=with_probabilities, backend=backend)
+                if len(predictions) == 0:
+                    continue
+                self._submit_shadow(batch_sentences, predictions, time.thread_time() - cpu_start, backend)
+
+                if sentence_sink is not None:
+                    try:
+                        sentence_sink(source_text_indices[start:end], original_sentences_passed_filter[start:end],
+                                      batch_sentences, predictions, probabilities)
+                    except Exception as e:
+                        print(f"Warning: sentence sink failed, continuing without it: {e}", file=sys.stderr)
+                        sentence_sink = None
+
+                duplicate_clusters.extend((len(classified_sentences) + idx, size) for idx, size in batch_clusters)
+                predicted_label_strings.extend(LABEL_MAPPING.get(p_idx, 'unknown') for p_idx in predictions)
+                classified_sentences.extend(original_sentences_passed_filter[start:end])
+
+            if not predicted_label_strings:
+                return [], [], {}
+            duplicate_clusters.sort(key=lambda cluster: -cluster[1])
+            duplicate_report = self.describe_duplicate_clusters(duplicate_clusters, predicted_label_strings, classified_sentences)
+
+            return predicted_label_strings, classified_sentences, duplicate_report
+
+        except Exception as e:
+            print(f"ERROR: An exception of type {type(e)} occurred during sentence classification: {e}", file=sys.stderr)
+            return [], [], {}
+
+    def _submit_shadow(self, processed_sentences, predictions, served_cpu_seconds, backend):
+        """Offers a classified batch to the shadow evaluator, which re-classifies sampled batches with its candidate model."""
+        if self.shadow is None:
+            return
+        try:
+            self.shadow.maybe_submit(processed_sentences, predictions, served_cpu_seconds, backend.version)
+        except Exception as e:
+            print(f"Warning: could not schedule shadow evaluation: {e}", file=sys.stderr)
+
+    @staticmethod
+    def _backend_predict(backend, processed_sentences, with_probabilities):
+        if with_probabilities:
+            return backend.predict_with_proba(processed_sentences)
+        return backend.predict(processed_sentences), None
+
+    def predict_sentences(self, processed_sentences, with_probabilities=False, backend=None):
+        """
+        Predicts label ids for preprocessed sentences. When near-duplicate collapsing is enabled, only one
+        representative per cluster goes through the backend and its label is copied to the whole cluster,
+        so label counts are the same as if every sentence had been classified.
+        backend defaults to the current self.backend.
+        Returns:
+            tuple: (array of label ids, empty if nothing could be classified,
+                    list of (representative index, size) for clusters of two or more sentences, largest first,
+                    (n_sentences, n_labels) probabilities if with_probabilities else None)
+        """
+        backend = backend or self.backend
+        if not self.collapse_near_duplicates:
+            predictions, probabilities = self._backend_predict(backend, processed_sentences, with_probabilities)
+            return predictions, [], probabilities
+
+        representative_indices, cluster_of = cluster_near_duplicates(processed_sentences, self.near_duplicate_threshold)
+        representative_predictions, representative_probabilities = self._backend_predict(
+            backend, [processed_sentences[i] for i in representative_indices], with_probabilities)
+        if len(representative_predictions) == 0:
+            return representative_predictions, [], representative_probabilities
+
+        cluster_sizes = np.bincount(cluster_of, minlength=len(representative_indices))
+        duplicate_clusters = [(representative_indices[c], int(cluster_sizes[c]))
+                              for c in np.argsort(-cluster_sizes, kind='stable') if cluster_sizes[c] > 1]
+        probabilities = representative_probabilities[cluster_of] if with_probabilities else None
+        return np.asarray(representative_predictions)[cluster_of], duplicate_clusters, probabilities
+
+    @staticmethod
+    def describe_duplicate_clusters(duplicate_clusters, predicted_labels, original_sentences):
+        """
+        Summarises near-duplicate clusters for the results page: how many there were, how many sentences
+        they absorbed, and the largest ones with their size, label and a sample sentence.
+        """
+        return {
+            'cluster_count': len(duplicate_clusters),
+            'collapsed_sentences': sum(size - 1 for _, size in duplicate_clusters),
+            'largest_clusters': [{
+                'size': size,
+                'label': predicted_labels[representative_idx],
+                'sample': original_sentences[representative_idx][:SAMPLE_MAX_CHARS],
+            } for representative_idx, size in duplicate_clusters[:DUPLICATE_CLUSTERS_REPORTED]],
+        }
+
+    @staticmethod
+    def prepare_sentences(texts):
+        """
+        Sentence-tokenizes and preprocesses texts, dropping sentences that end up empty.
+        Returns:
+            tuple: (preprocessed sentences, original sentences, index of the source text for each sentence)
+        """
+        processed_sentences = []
+        original_sentences = []
+        source_text_indices = []
+        for text_idx, text in enumerate(texts):
+            for original_sent in tokenize_amharic_sentences(text):
+                processed_sent = preprocess_amharic_text(original_sent)
+                if processed_sent.strip():
+                    processed_sentences.append(processed_sent)
+                    original_sentences.append(original_sent)
+                    source_text_indices.append(text_idx)
+        return processed_sentences, original_sentences, source_text_indices
+
+    @staticmethod
+    def add_label_breakdown(summary, predicted_labels):
+        """Adds count and percentage entries for each label in ORDERED_LABELS to the summary dict."""
+        label_counts = Counter(predicted_labels)
+        total_classified_sentences = len(predicted_labels)
+        summary['total_sentences_classified'] = total_classified_sentences
+        for label in ORDERED_LABELS:
+            count = label_counts.get(label, 0)
+            percentage = (count / total_classified_sentences) * 100 if total_classified_sentences > 0 else 0
+            summary[label] = {'count': count, 'percentage': f"{percentage:.2f}%"}
+        return summary
+
+    @staticmethod
+    def pick_samples(predicted_labels, classified_sentences):
+        """Returns up to SAMPLES_PER_LABEL truncated example sentences for each label."""
+        samples = {label: [] for label in ORDERED_LABELS}
+        for predicted_label, original_sent in zip(predicted_labels, classified_sentences):
+            label_samples = samples.get(predicted_label)
+            if label_samples is not None and len(label_samples) < SAMPLES_PER_LABEL:
+                label_samples.append(original_sent[:SAMPLE_MAX_CHARS] + '...')
+            if all(len(s) >= SAMPLES_PER_LABEL for s in samples.values()):
+                break
+        return samples
+
+    async def analyze(self, url_info, message_limit=None, sampling=None):
+        """
+        Returns the analysis for a parsed Telegram URL (see parse_telegram_url), served from the
+        result cache when possible. sampling switches channels/groups to a sampled estimate (see run_analysis). Stale cache entries are returned immediately and refreshed in
+        a background thread (stale-while-revalidate). Errors are never cached.
+        """
+        if self.result_cache is None:
+            return await self.run_analysis(url_info, message_limit, sampling)
+
+        cache_key = make_cache_key(url_info, message_limit, sampling)
+        cached_results, age_seconds = self.result_cache.get(cache_key)
+        if cached_results is not None:
+            # Results of an older model version are served once more but recomputed with the current one.
+            stale = self.result_cache.is_stale(age_seconds) or cached_results.get('model_version') != self.backend.version
+            if stale:
+                self._schedule_refresh(cache_key, url_info, message_limit, sampling)
+            # The cached copy may have been produced for a differently spelled URL.
+            cached_results['url'] = url_info['original_url']
+            cached_results['cache'] = self._cache_info(hit=True, age_seconds=age_seconds, stale=stale)
+            return cached_results
+
+        analysis_results = await self.run_analysis(url_info, message_limit, sampling)
+        if not analysis_results['error']:
+            self.result_cache.set(cache_key, analysis_results)
+        analysis_results['cache'] = self._cache_info(hit=False, age_seconds=0, stale=False)
+        return analysis_results
+
+    def _cache_info(self, hit, age_seconds, stale):
+        return {
+            'hit': hit,
+            'age_seconds': int(age_seconds),
+            'stale': stale,
+            'hit_rate': f"{self.result_cache.hit_rate() * 100:.1f}%",
+        }
+
+    def _schedule_refresh(self, cache_key, url_info, message_limit, sampling=None):
+        """Re-runs an analysis in a daemon thread and replaces the cache entry; at most one refresh per key."""
+        with self._refresh_lock:
+            if cache_key in self._refreshing_keys:
+                return
+            self._refreshing_keys.add(cache_key)
+
+        def refresh():
+            try:
+                refreshed_results = asyncio.run(self.run_analysis(dict(url_info), message_limit, sampling))
+                if not refreshed_results['error']:
+                    self.result_cache.set(cache_key, refreshed_results)
+            except Exception as e:
+                print(f"Warning: background refresh of {url_info['original_url']} failed: {e}", file=sys.stderr)
+            finally:
+                with self._refresh_lock:
+                    self._refreshing_keys.discard(cache_key)
+
+        threading.Thread(target=refresh, name=f"refresh-{url_info['original_url']}", daemon=True).start()
+
+    async def run_analysis(self, url_info, message_limit=None, sampling=None):
+        """
+        Runs a full, uncached analysis for a parsed Telegram URL (see parse_telegram_url).
+        With sampling ({'ci_width': ..., 'confidence': ...}), a channel/group is not read from the newest
+        message down but estimated from random blocks across its history (see _estimate_channel_or_group);
+        message_limit is then ignored, and post URLs are analyzed as usual.
+        Returns the results dict rendered by results.html; failures are reported in its 'error' key.
+        """
+        # Pinned for the whole analysis, so a model swapped in meanwhile only affects later requests.
+        backend = self.backend
+        analysis_results = {
+            'url': url_info['original_url'],
+            'model_version': backend.version,
+            'error': None,
+            'summary': {},
+            'samples': {label: [] for label in ORDERED_LABELS}
+        }
+
+        try:
+            if url_info['type'] == 'channel_or_group' and sampling:
+                return await self._estimate_channel_or_group(url_info, sampling, backend, analysis_results)
+            if url_info['type'] == 'channel_or_group':
+                texts, summary = await self._scrape_channel_or_group(url_info, message_limit)
+            elif url_info['type'] == 'message':
+                texts, summary = await self._scrape_message_comments(url_info)
+            else:
+                analysis_results['error'] = "Invalid Telegram URL format. Please enter a valid Telegram channel/group or post URL."
+                return analysis_results
+
+            if texts is None:
+                analysis_results['error'] = summary
+                return analysis_results
+
+            sentence_sink, close_export = (self._make_export_sink(url_info, message_limit, texts, analysis_results, backend)
+                                           if self.export_enabled else (None, None))
+            try:
+                predicted_labels_only, classified_original_sentences, duplicate_report = self.classify_sentences(texts, sentence_sink, backend)
+            finally:
+                if close_export is not None:
+                    close_export()
+
+            if not predicted_labels_only:
+                analysis_results['error'] = "No sentences were classified after preprocessing and model prediction. This might mean all texts were filtered out (e.g., all emojis, links, or stopwords) or an error occurred during classification."
+                return analysis_results
+
+            analysis_results['summary'] = self.add_label_breakdown(summary, predicted_labels_only)
+            analysis_results['samples'] = self.pick_samples(predicted_labels_only, classified_original_sentences)
+            analysis_results['near_duplicates'] = duplicate_report
+
+        except ConnectionRefusedError:
+            analysis_results['error'] = "Telegram authorization failed. This usually means the API ID/HASH or Session String environment variables are incorrect, expired, or not set on the server."
+        except ValueError as e:
+            analysis_results['error'] = f"Telegram Entity Error: {e}. Please check the URL and your Telegram account access."
+        except Exception as e:
+            print(f"An unexpected error occurred during analysis: {e}", file=sys.stderr)
+            analysis_results['error'] = f"An unexpected server error occurred during analysis: {e}"
+
+        return analysis_results
+
+    async def _estimate_channel_or_group(self, url_info, sampling, backend, analysis_results):
+        """
+        Estimates the label proportions of a whole channel/group from random message blocks, classifying
+        each round of blocks as it arrives and stopping as soon as every label in ESTIMATED_LABELS has a
+        confidence interval no wider than sampling['ci_width'] (see BlockProportionEstimator).
+        The summary's label breakdown and samples describe the sampled sentences; summary['estimate']
+        holds the channel-wide estimates with their intervals and the sample size used.
+        Per-sentence export and near-duplicate reporting are skipped in this mode.
+        """
+        label_positions = {label: position for position, label in enumerate(ORDERED_LABELS)}
+        estimator = None
+        predicted_labels = []
+        classified_sentences = []
+
+        def on_round(round_corpus, row_blocks, round_block_count, total_blocks):
+            nonlocal estimator
+            if estimator is None:
+                estimator = BlockProportionEstimator(ORDERED_LABELS, total_blocks, sampling['confidence'])
+            # Blocks without any classified sentence still count as sampled clusters.
+            block_counts = np.zeros((round_block_count, len(ORDERED_LABELS)), dtype=np.int64)
+
+            processed_sentences, original_sentences, text_indices = self.prepare_sentences(round_corpus)
+            if processed_sentences:
+                cpu_start = time.thread_time()
+                predictions = self.predict_sentences(processed_sentences, backend=backend)[0]
+                if len(predictions):
+                    self._submit_shadow(processed_sentences, predictions, time.thread_time() - cpu_start, backend)
+                    round_labels = [LABEL_MAPPING.get(p_idx, 'unknown') for p_idx in predictions]
+                    sentence_blocks = np.asarray(row_blocks)[text_indices]
+                    np.add.at(block_counts, (sentence_blocks, [label_positions[label] for label in round_labels]), 1)
+                    predicted_labels.extend(round_labels)
+                    classified_sentences.extend(original_sentences)
+            estimator.add_blocks(block_counts)
+            return estimator.converged(sampling['ci_width'], ESTIMATED_LABELS, SAMPLING_MIN_BLOCKS)
+
+        sampled_corpus, sample_info = await sample_channel_or_group_content(
+            url_info['identifier'], on_round, SAMPLING_BLOCK_MESSAGES, SAMPLING_BLOCKS_PER_ROUND, SAMPLING_MAX_MESSAGES)
+
+        if not predicted_labels:
+            analysis_results['error'] = f"No sentences were classified from the sampled messages of {url_info['original_url']}. The channel/group may be private, inaccessible, or have no text content."
+            return analysis_results
+
+        summary = {
+            'type': 'Channel/Group Analysis',
+            'total_messages_scraped': sampled_corpus.message_count,
+            'messages_with_comments': sample_info['messages_with_comments'],
+            'total_comments_scraped': sample_info['total_comments_scraped'],
+        }
+        widths = estimator.interval_widths(ESTIMATED_LABELS)
+        summary['estimate'] = {
+            'confidence': sampling['confidence'],
+            'target_ci_width': sampling['ci_width'],
+            'converged': all(width <= sampling['ci_width'] for width in widths.values()),
+            'stop_reason': sample_info['stop_reason'],
+            'blocks_sampled': sample_info['blocks_sampled'],
+            'blocks_total': sample_info['blocks_total'],
+            'block_size': sample_info['block_size'],
+            'newest_message_id': sample_info['newest_message_id'],
+            'sentences_sampled': estimator.sentences_sampled,
+            'labels': {label: {
+                'proportion': proportion,
+                'ci_low': low,
+                'ci_high': high,
+            } for label, (proportion, low, high) in estimator.estimates().items()},
+        }
+        analysis_results['summary'] = self.add_label_breakdown(summary, predicted_labels)
+        analysis_results['samples'] = self.pick_samples(predicted_labels, classified_sentences)
+        return analysis_results
+
+    def _make_export_sink(self, url_info, message_limit, texts, analysis_results, backend):
+        """
+        Builds a classify_sentences sentence_sink that appends each classified batch to an export file,
+        opened on the first batch. Returns (sink, close); close must be called once classification is done.
+        """
+        export_path = make_export_path(url_info)
+        metadata = {
+            'url': url_info['original_url'],
+            'type': url_info['type'],
+            'identifier': url_info.get('identifier'),
+            'message_id': url_info.get('message_id'),
+            'message_limit': message_limit,
+            'created_at': time.time(),
+            'backend': backend.name,
+            'model_version': backend.version,
+        }
+        if isinstance(texts, ScrapedCorpus):
+            text_message_ids, text_parent_message_ids = texts.message_ids, texts.parent_message_ids
+        else:
+            # Post comments are fetched as plain texts: only their parent post id is known.
+            text_message_ids = np.full(len(texts), -1, dtype=np.int64)
+            text_parent_message_ids = np.full(len(texts), url_info.get('message_id', -1), dtype=np.int64)
+
+        writer = None
+
+        def export_sink(text_indices, sentences, processed_sentences, label_ids, probabilities):
+            nonlocal writer
+            if writer is None:
+                writer = AnalysisExportWriter(export_path, metadata)
+                analysis_results['export_path'] = export_path
+            write_sentence_predictions(writer, texts, text_message_ids, text_parent_message_ids,
+                                       text_indices, sentences, processed_sentences, label_ids, probabilities)
+
+        def close():
+            if writer is not None:
+                writer.close()
+
+        return export_sink, close
+
+    async def _scrape_channel_or_group(self, url_info, message_limit):
+        """Returns (texts, summary), or (None, error message) when nothing was scraped."""
+        channel_content_data, messages_with_comments_count, total_comments_scraped = \
+            await get_channel_or_group_content(url_info['identifier'], message_limit)
+
+        if not channel_content_data:
+            return None, f"No content retrieved from Telegram channel/group: {url_info['original_url']}. This might mean the channel/group is private, inaccessible, or had no recent messages with text content."
+
+        summary = {
+            'type': 'Channel/Group Analysis',
+            'total_messages_scraped': channel_content_data.message_count,
+            'messages_with_comments': messages_with_comments_count,
+            'total_comments_scraped': total_comments_scraped,
+        }
+        # The corpus iterates over message and comment texts in order, which classify_sentences consumes directly.
+        return channel_content_data, summary
+
+    async def _scrape_message_comments(self, url_info):
+        """Returns (texts, summary), or (None, error message) when the post has no comments."""
+        comments = await get_telegram_comments_for_message(url_info['identifier'], url_info['message_id'])
+
+        if not comments:
+            return None, f"No comments retrieved from Telegram Post: {url_info['original_url']}. This might mean the post has no comments, or the channel/group is private/inaccessible."
+
+        summary = {
+            'type': 'Post Comments Analysis',
+            'total_comments_retrieved': len(comments),
+        }
+        return comments, summary
+
+    async def analyze_trends(self, url_info, granularity='day', message_limit=TREND_MESSAGE_LIMIT):
+        """
+        Returns the per-day or per-week label histogram of a channel/group. The first request scrapes its
+        newest message_limit messages. Later requests read up to message_limit messages after the stored
+        watermark, oldest first, so a long gap is caught up over several requests without holes.
+        Classified sentences are counted per day by a TrendAggregator and only those counts are added to
+        the TrendStore. Counts from an older model version are discarded and rebuilt. If classification
+        fails, nothing is stored and the watermark stays put, so the same messages are retried next time.
+        Returns:
+            dict: {'url', 'model_version', 'granularity', 'buckets': [...], 'update': {...}, 'error': str or None}
+        """
+        backend = self.backend
+        trend_results = {'url': url_info['original_url'], 'model_version': backend.version, 'granularity': granularity,
+                         'buckets': [], 'update': {}, 'error': None}
+        if url_info['type'] != 'channel_or_group':
+            trend_results['error'] = "Trends are only available for channel/group URLs."
+            return trend_results
+        if self.trend_store is None:
+            trend_results['error'] = "Trend storage is disabled. Set TREND_STORE_ENABLED=1."
+            return trend_results
+
+        channel = url_info['identifier']
+        watermark = self.trend_store.watermark(channel)
+        if watermark is not None and watermark['model_version'] != backend.version:
+            print(f"Trend counts of '{channel}' were made with model version '{watermark['model_version']}', rebuilding.", file=sys.stderr)
+            self.trend_store.reset(channel)
+            watermark = None
+        expected_message_id = watermark['newest_message_id'] if watermark else None
+
+        try:
+            channel_content_data, _, total_comments_scraped = await get_channel_or_group_content(
+                channel, message_limit, min_id=expected_message_id or 0, reverse=watermark is not None)
+        except ConnectionRefusedError:
+            trend_results['error'] = "Telegram authorization failed. This usually means the API ID/HASH or Session String environment variables are incorrect, expired, or not set on the server."
+            return trend_results
+        except ValueError as e:
+            trend_results['error'] = f"Telegram Entity Error: {e}. Please check the URL and your Telegram account access."
+            return trend_results
+        except Exception as e:
+            print(f"An unexpected error occurred during trend analysis: {e}", file=sys.stderr)
+            trend_results['error'] = f"An unexpected server error occurred during analysis: {e}"
+            return trend_results
+
+        if watermark is None and not channel_content_data:
+            trend_results['error'] = f"No content retrieved from Telegram channel/group: {url_info['original_url']}."
+            return trend_results
+
+        new_days = TrendAggregator('day')
+        predicted_labels = []
+        if channel_content_data:
+            # Not classify_sentences: it reports a failed classification as "no sentences", which would move
+            # the watermark past messages that were never counted.
+            processed_sentences, _, source_text_indices = self.prepare_sentences(channel_content_data)
+            if processed_sentences:
+                try:
+                    cpu_start = time.thread_time()
+                    predicted_labels = self.predict_sentences(processed_sentences, backend=backend)[0]
+                except Exception as e:
+                    print(f"ERROR: Classification failed during trend analysis of '{channel}': {e}", file=sys.stderr)
+                    trend_results['error'] = f"Classification failed, so the trend counts were not updated: {e}"
+                    return trend_results
+                if len(predicted_labels):
+                    self._submit_shadow(processed_sentences, predicted_labels, time.thread_time() - cpu_start, backend)
+                    new_days.add(channel_content_data.dates[np.asarray(source_text_indices, dtype=np.int64)], predicted_labels)
+            message_ids = channel_content_data.message_ids[channel_content_data.parent_rows < 0]
+            stored = self.trend_store.add(channel, new_days.histogram(), expected_message_id, int(message_ids.max()),
+                                          backend.version, len(message_ids), len(predicted_labels))
+            if not stored:
+                print(f"Trend counts of '{channel}' were updated by another request meanwhile; dropping this update.", file=sys.stderr)
+
+        trend_buckets = TrendAggregator(granularity)
+        trend_buckets.merge(self.trend_store.day_histogram(channel))
+        trend_results['buckets'] = trend_buckets.buckets()
+        trend_results['update'] = {
+            'incremental': watermark is not None,
+            'new_messages': channel_content_data.message_count,
+            'new_comments': total_comments_scraped,
+            'new_sentences': len(predicted_labels),
+            'days_updated': len(new_days.histogram()),
+            # A full page means more messages may be waiting after the new watermark.
+            'caught_up': not message_limit or channel_content_data.message_count < message_limit,
+        }
+        return trend_results
+
+    async def analyze_many(self, url_infos, message_limit=None):
+        """
+        Analyzes several channels/groups in one go. All channels are scraped concurrently on a single
+        Telegram client (sharing the process-wide MULTI_CHANNEL_MAX_CONCURRENCY limit with other requests)
+        and their sentences are classified together in one inference batch.
+        Returns:
+            dict: {'channels': [per-channel results], 'combined': summary over all channels, 'error': str or None}
+        """
+        backend = self.backend
+        # The same channel listed twice would be scraped, classified and counted twice; keep the first.
+        unique_url_infos = {}
+        for url_info in url_infos:
+            key = (url_info.get('identifier'), url_info.get('message_id')) if url_info.get('identifier') else id(url_info)
+            unique_url_infos.setdefault(key, url_info)
+        url_infos = list(unique_url_infos.values())
+
+        channel_results = []
+        for url_info in url_infos:
+            channel_results.append({
+                'url': url_info['original_url'],
+                'error': None,
+                'summary': {},
+                'samples': {label: [] for label in ORDERED_LABELS},
+            })
+            if url_info['type'] != 'channel_or_group':
+                channel_results[-1]['error'] = "Only channel/group URLs are supported for multi-channel analysis."
+
+        multi_results = {'channels': channel_results, 'combined': {}, 'error': None, 'model_version': backend.version}
+        scrape_targets = [url_info['identifier'] for url_info, result in zip(url_infos, channel_results) if not result['error']]
+        if not scrape_targets:
+            multi_results['error'] = "No valid Telegram channel/group URLs were provided."
+            return multi_results
+
+        try:
+            scraped_by_identifier = await get_multiple_channels_content(scrape_targets, message_limit)
+        except ConnectionRefusedError:
+            multi_results['error'] = "Telegram authorization failed. This usually means the API ID/HASH or Session String environment variables are incorrect, expired, or not set on the server."
+            return multi_results
+        except Exception as e:
+            print(f"An unexpected error occurred during multi-channel analysis: {e}", file=sys.stderr)
+            multi_results['error'] = f"An unexpected server error occurred during analysis: {e}"
+            return multi_results
+
+        # Preprocess each channel's corpus and concatenate the sentences into one batch,
+        # remembering which channel each sentence came from.
+        processed_sentences = []
+        original_sentences = []
+        sentence_channel_indices = []
+        for channel_idx, (url_info, result) in enumerate(zip(url_infos, channel_results)):
+            if result['error']:
+                continue
+            scraped = scraped_by_identifier.get(url_info['identifier'])
+            if isinstance(scraped, Exception):
+                result['error'] = f"Telegram Entity Error: {scraped}"
+                continue
+            channel_content_data, messages_with_comments_count, total_comments_scraped = scraped
+            if not channel_content_data:
+                result['error'] = f"No content retrieved from Telegram channel/group: {result['url']}."
+                continue
+            result['summary'] = {
+                'type': 'Channel/Group Analysis',
+                'total_messages_scraped': channel_content_data.message_count,
+                'messages_with_comments': messages_with_comments_count,
+                'total_comments_scraped': total_comments_scraped,
+            }
+            channel_processed, channel_originals, _ = self.prepare_sentences(channel_content_data)
+            processed_sentences.extend(channel_processed)
+            original_sentences.extend(channel_originals)
+            sentence_channel_indices.extend([channel_idx] * len(channel_processed))
+
+        predictions, duplicate_clusters = [], []
+        if processed_sentences:
+            try:
+                cpu_start = time.thread_time()
+                predictions, duplicate_clusters, _ = self.predict_sentences(processed_sentences, backend=backend)
+                if len(predictions):
+                    self._submit_shadow(processed_sentences, predictions, time.thread_time() - cpu_start, backend)
+            except Exception as e:
+                print(f"ERROR: An exception of type {type(e)} occurred during sentence classification: {e}", file=sys.stderr)
+        if len(predictions) == 0:
+            multi_results['error'] = "No sentences were classified after preprocessing and model prediction."
+            return multi_results
+
+        labels_by_channel = {}
+        sentences_by_channel = {}
+        for p_idx, original_sent, channel_idx in zip(predictions, original_sentences, sentence_channel_indices):
+            labels_by_channel.setdefault(channel_idx, []).append(LABEL_MAPPING.get(p_idx, 'unknown'))
+            sentences_by_channel.setdefault(channel_idx, []).append(original_sent)
+
+        all_labels = []
+        for channel_idx, result in enumerate(channel_results):
+            if result['error']:
+                continue
+            channel_labels = labels_by_channel.get(channel_idx, [])
+            if not channel_labels:
+                result['error'] = "No sentences were classified after preprocessing and model prediction."
+                continue
+            self.add_label_breakdown(result['summary'], channel_labels)
+            result['samples'] = self.pick_samples(channel_labels, sentences_by_channel[channel_idx])
+            all_labels.extend(channel_labels)
+
+        # Clusters are found across channels, so campaigns spanning several channels show up here.
+        predicted_labels = [LABEL_MAPPING.get(p_idx, 'unknown') for p_idx in predictions]
+        multi_results['near_duplicates'] = self.describe_duplicate_clusters(duplicate_clusters, predicted_labels, original_sentences)
+
+        multi_results['combined'] = self.add_label_breakdown({
+            'channels_analyzed': sum(1 for result in channel_results if not result['error']),
+            'channels_failed': sum(1 for result in channel_results if result['error']),
+        }, all_labels)
+        return multi_results
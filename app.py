@@ -1,42 +1,36 @@
-import joblib
-import asyncio
 import sys
-from collections import Counter
 import re
-import numpy as np
-from flask import Flask, render_template, request, redirect, url_for
-import os 
+import hmac
+import multiprocessing
+from flask import Flask, render_template, request, jsonify
+import os
 
 # This library is crucial for running async code (Telethon) inside a sync Flask app.
 # It patches asyncio to allow nested event loops.
 import nest_asyncio
 nest_asyncio.apply()
 
-from config import VECTORIZER_PATH, MODEL_PATH, LABEL_MAPPING
-from amharic_preprocessing import preprocess_amharic_text, tokenize_amharic_sentences
-# Import the wrapped scraping functions and the main _run_telethon_client_task
-from telegram_scraper import (
-    get_telegram_comments_for_message,
-    get_channel_or_group_content,
-    parse_telegram_url,
-    _run_telethon_client_task # <--- NEW: Import the wrapper
+from config import (
+    VECTORIZER_PATH, MODEL_PATH, INFERENCE_BACKEND, RESULT_CACHE_ENABLED, MULTI_CHANNEL_MAX_URLS, MODEL_ADMIN_TOKEN,
+    SHADOW_MODEL_VERSION, SAMPLING_CI_WIDTH, SAMPLING_CONFIDENCE, TREND_STORE_ENABLED, TREND_MESSAGE_LIMIT,
 )
+from inference import load_inference_backend
+from analysis_service import AnalysisService
+from model_reloader import ModelReloader, smoke_test_backend
+from shadow_evaluation import ShadowEvaluator
+from result_cache import ResultCache
+from trend_aggregation import GRANULARITIES
+from trend_store import TrendStore
+from telegram_scraper import parse_telegram_url
 
-# --- Flask App Initialization ---
-app = Flask(__name__)
+DEFAULT_MESSAGE_LIMIT = 1000
+ADMIN_FORBIDDEN_MESSAGE = "Forbidden. Set MODEL_ADMIN_TOKEN and send it in the X-Admin-Token header."
 
-# --- Global variables for loaded model and vectorizer ---
-# These are loaded once when the Flask app starts
-vectorizer = None
-model = None
 
-def load_model_and_vectorizer():
-    """Loads the pre-trained TF-IDF vectorizer and classification model."""
-    global vectorizer, model
+def load_analysis_service(backend_name=INFERENCE_BACKEND):
+    """Loads the configured inference backend and wraps it in an AnalysisService."""
     try:
-        vectorizer = joblib.load(VECTORIZER_PATH)
-        model = joblib.load(MODEL_PATH)
-        print("Model and vectorizer loaded successfully.", file=sys.stderr)
+        backend = load_inference_backend(backend_name)
     except FileNotFoundError:
         print(f"CRITICAL ERROR: Model or vectorizer not found at '{VECTORIZER_PATH}' or '{MODEL_PATH}'. "
               "Please ensure 'python model_trainer.py' was run locally and the 'models/' directory is in your Git repo.", file=sys.stderr)
@@ -44,189 +38,209 @@ def load_model_and_vectorizer():
     except Exception as e:
         print(f"CRITICAL ERROR loading model or vectorizer: {e} (Type: {type(e)})", file=sys.stderr)
         sys.exit(1)
+    result_cache = ResultCache() if RESULT_CACHE_ENABLED else None
+    trend_store = TrendStore() if TREND_STORE_ENABLED else None
+    return AnalysisService(backend, result_cache=result_cache, shadow=load_shadow_evaluator(backend_name), trend_store=trend_store)
 
-def classify_sentences(texts_to_analyze):
+
+def load_shadow_evaluator(backend_name=INFERENCE_BACKEND, version=SHADOW_MODEL_VERSION):
     """
-    Sentence-tokenizes a list of texts, preprocesses each sentence, and classifies them.
-    Returns:
-        tuple: (list of predicted label strings, list of original sentences that were classified)
+    Starts shadow evaluation of a candidate model version, or returns None if none is configured or it is unusable.
+    The candidate is validated here once; the ShadowEvaluator then loads it in its own process.
     """
-    if not texts_to_analyze:
-        return [], []
+    if not version:
+        return None
+    try:
+        smoke_test_backend(load_inference_backend(backend_name, version))
+    except Exception as e:
+        print(f"Warning: shadow model version '{version}' could not be loaded, shadow evaluation disabled: {e}", file=sys.stderr)
+        return None
+    return ShadowEvaluator(version, backend_name)
 
-    sentences_for_classification = []
-    original_sentences_passed_filter = []
 
-    for text in texts_to_analyze:
-        sentences_in_text = tokenize_amharic_sentences(text)
-        for original_sent in sentences_in_text:
-            processed_sent = preprocess_amharic_text(original_sent)
-            if processed_sent.strip():
-                sentences_for_classification.append(processed_sent)
-                original_sentences_passed_filter.append(original_sent)
+def parse_message_limit(message_limit_str):
+    """Parses the form's message limit: a positive int, 'all' (None) or the default on anything else."""
+    if not message_limit_str:
+        return DEFAULT_MESSAGE_LIMIT
+    if message_limit_str.lower() == 'all':
+        return None
+    try:
+        limit = int(message_limit_str)
+    except ValueError:
+        return DEFAULT_MESSAGE_LIMIT
+    return limit if limit > 0 else DEFAULT_MESSAGE_LIMIT
 
-    if not sentences_for_classification:
-        return [], []
 
+def parse_sampling(ci_width_str):
+    """
+    Parses the form's estimate field: the target confidence-interval width in percentage points
+    (e.g. '5' for estimates known to within +/-2.5 points), or 'default' for SAMPLING_CI_WIDTH.
+    Returns the sampling settings for AnalysisService.analyze, or None (analyze the most recent
+    messages) if empty or invalid.
+    """
+    if not ci_width_str:
+        return None
+    if ci_width_str.strip().lower() == 'default':
+        return {'ci_width': SAMPLING_CI_WIDTH, 'confidence': SAMPLING_CONFIDENCE}
     try:
-        sentence_vectors = vectorizer.transform(sentences_for_classification)
-        if sentence_vectors.shape[0] == 0 or sentence_vectors.nnz == 0:
-            return [], []
+        ci_width = float(ci_width_str.strip().rstrip('%')) / 100
+    except ValueError:
+        return None
+    if not 0 < ci_width < 1:
+        return None
+    return {'ci_width': ci_width, 'confidence': SAMPLING_CONFIDENCE}
 
-        predictions = model.predict(sentence_vectors)
-        
-        predicted_label_strings = [LABEL_MAPPING.get(p_idx, 'unknown') for p_idx in predictions]
-        
-        return predicted_label_strings, original_sentences_passed_filter
 
-    except Exception as e:
-        print(f"ERROR: An exception of type {type(e)} occurred during sentence classification: {e}", file=sys.stderr)
-        return [], []
-
-# --- Flask Routes ---
-@app.route('/', methods=['GET'])
-def index():
-    return render_template('index.html')
-
-@app.route('/analyze', methods=['POST'])
-async def analyze():
-    url = request.form.get('url')
-    message_limit_str = request.form.get('message_limit')
-    
-    if not url:
-        return render_template('results.html', error="Please provide a Telegram URL.")
-
-    if not re.match(r'https?://(?:www\.)?\S+', url):
-        return render_template('results.html', error="Invalid URL format. Please enter a valid URL starting with http:// or https://")
-
-    url_info = await parse_telegram_url(url)
-    url_info['original_url'] = url
-
-    if url_info['type'] == 'invalid':
-        return render_template('results.html', error="Invalid Telegram URL format. Please enter a valid Telegram channel/group or post URL.")
-    elif "facebook.com/" in url:
-        return render_template('results.html', error="Facebook scraping is not supported for this project. Please use Telegram URLs.")
-
-    analysis_results = {
-        'url': url,
-        'error': None,
-        'summary': {},
-        'samples': {'hate': [], 'offensive': [], 'normal': []}
-    }
-
-    try:
-        # Call the appropriate async scraper function wrapped by _run_telethon_client_task
-        if url_info['type'] == 'channel_or_group':
-            message_limit = 1000 # Default
-            if message_limit_str and message_limit_str.lower() != 'all':
-                try:
-                    limit = int(message_limit_str)
-                    if limit > 0:
-                        message_limit = limit
-                except ValueError:
-                    pass
-            elif message_limit_str and message_limit_str.lower() == 'all':
-                message_limit = None
-
-            channel_content_data, messages_with_comments_count, total_comments_scraped = \
-                await get_channel_or_group_content(url_info['identifier'], message_limit) # This now includes client lifecycle
-
-            if not channel_content_data:
-                analysis_results['error'] = f"No content retrieved from Telegram channel/group: {url}. This might mean the channel/group is private, inaccessible, or had no recent messages with text content."
-                return render_template('results.html', results=analysis_results)
-
-            all_texts_for_classification = []
-            total_messages_scraped = len(channel_content_data)
-            
-            for item in channel_content_data:
-                all_texts_for_classification.append(item['message_text'])
-                all_texts_for_classification.extend(item['comments'])
-
-            predicted_labels_only, classified_original_sentences = classify_sentences(all_texts_for_classification)
-
-            if not predicted_labels_only:
-                analysis_results['error'] = "No sentences were classified after preprocessing and model prediction. This might mean all texts were filtered out (e.g., all emojis, links, or stopwords) or an error occurred during classification."
-                return render_template('results.html', results=analysis_results)
-
-            label_counts = Counter(predicted_labels_only)
-            total_classified_sentences = len(predicted_labels_only)
-
-            analysis_results['summary'] = {
-                'type': 'Channel/Group Analysis',
-                'total_messages_scraped': total_messages_scraped,
-                'messages_with_comments': messages_with_comments_count,
-                'total_comments_scraped': total_comments_scraped,
-                'total_sentences_classified': total_classified_sentences
-            }
-            ordered_labels = ['hate', 'offensive', 'normal']
-            for label in ordered_labels:
-                count = label_counts.get(label, 0)
-                percentage = (count / total_classified_sentences) * 100 if total_classified_sentences > 0 else 0
-                analysis_results['summary'][label] = {'count': count, 'percentage': f"{percentage:.2f}%"}
-
-            samples_displayed = {label: 0 for label in ordered_labels}
-            for i, original_sent in enumerate(classified_original_sentences):
-                predicted_label = predicted_labels_only[i]
-                if samples_displayed[predicted_label] < 3:
-                    analysis_results['samples'][predicted_label].append(original_sent[:200] + '...')
-                    samples_displayed[predicted_label] += 1
-                if all(count >= 3 for count in samples_displayed.values()):
-                    break
-
-        elif url_info['type'] == 'message':
-            comments = await get_telegram_comments_for_message(url_info['identifier'], url_info['message_id']) # This now includes client lifecycle
-
-            if not comments:
-                analysis_results['error'] = f"No comments retrieved from Telegram Post: {url}. This might mean the post has no comments, or the channel/group is private/inaccessible."
-                return render_template('results.html', results=analysis_results)
-
-            predicted_labels_only, classified_original_sentences = classify_sentences(comments)
-
-            if not predicted_labels_only:
-                analysis_results['error'] = "No sentences were classified from comments after preprocessing and model prediction. This might mean all comments were filtered out (e.g., all emojis, links, or stopwords) or an error occurred during classification."
-                return render_template('results.html', results=analysis_results)
-
-            label_counts = Counter(predicted_labels_only)
-            total_classified_sentences = len(predicted_labels_only)
-
-            analysis_results['summary'] = {
-                'type': 'Post Comments Analysis',
-                'total_comments_retrieved': len(comments),
-                'total_sentences_classified': total_classified_sentences
-            }
-            ordered_labels = ['hate', 'offensive', 'normal']
-            for label in ordered_labels:
-                count = label_counts.get(label, 0)
-                percentage = (count / total_classified_sentences) * 100 if total_classified_sentences > 0 else 0
-                analysis_results['summary'][label] = {'count': count, 'percentage': f"{percentage:.2f}%"}
-
-            samples_displayed = {label: 0 for label in ordered_labels}
-            for i, original_sent in enumerate(classified_original_sentences):
-                predicted_label = predicted_labels_only[i]
-                if samples_displayed[predicted_label] < 3:
-                    analysis_results['samples'][predicted_label].append(original_sent[:200] + '...')
-                    samples_displayed[predicted_label] += 1
-                if all(count >= 3 for count in samples_displayed.values()):
-                    break
-
-    except ConnectionRefusedError:
-        analysis_results['error'] = "Telegram authorization failed. This usually means the API ID/HASH or Session String environment variables are incorrect, expired, or not set on the server."
-    except ValueError as e:
-        analysis_results['error'] = f"Telegram Entity Error: {e}. Please check the URL and your Telegram account access."
-    except Exception as e:
-        print(f"An unexpected error occurred during analysis: {e}", file=sys.stderr)
-        analysis_results['error'] = f"An unexpected server error occurred during analysis: {e}"
-    finally:
-        pass 
+def create_app(service=None):
+    """
+    Application factory. The AnalysisService (and therefore the inference backend)
+    is loaded once per app; pass one in to reuse or swap it, e.g. for benchmarks.
+    New model versions are hot-swapped into it by a ModelReloader (see model_reloader.py).
+    """
+    app = Flask(__name__)
+    if service is None:
+        service = load_analysis_service()
+    app.config['ANALYSIS_SERVICE'] = service
+    app.config['MODEL_RELOADER'] = ModelReloader(service)
+    app.config['MODEL_RELOADER'].start_watching()
+
+    def render_error(message):
+        # results.html reads everything from `results`, including early validation errors.
+        return render_template('results.html', results={'url': request.form.get('url'), 'error': message, 'summary': {}, 'samples': {}})
+
+    # --- Flask Routes ---
+    @app.route('/', methods=['GET'])
+    def index():
+        return render_template('index.html')
+
+    @app.route('/analyze', methods=['POST'])
+    async def analyze():
+        url = request.form.get('url')
+        message_limit = parse_message_limit(request.form.get('message_limit'))
+        sampling = parse_sampling(request.form.get('ci_width'))
+
+        if not url:
+            return render_error("Please provide a Telegram URL.")
+
+        if not re.match(r'https?://(?:www\.)?\S+', url):
+            return render_error("Invalid URL format. Please enter a valid URL starting with http:// or https://")
+
+        url_info = await parse_telegram_url(url)
+        url_info['original_url'] = url
+
+        if url_info['type'] == 'invalid':
+            return render_error("Invalid Telegram URL format. Please enter a valid Telegram channel/group or post URL.")
+        elif "facebook.com/" in url:
+            return render_error("Facebook scraping is not supported for this project. Please use Telegram URLs.")
+
+        analysis_results = await app.config['ANALYSIS_SERVICE'].analyze(url_info, message_limit, sampling)
+        return render_template('results.html', results=analysis_results)
+
+    @app.route('/analyze/multi', methods=['POST'])
+    async def analyze_multi():
+        """
+        Analyzes several channels/groups at once and returns per-channel and combined label
+        distributions as JSON. Accepts a JSON body {"urls": [...], "message_limit": ...} or form
+        fields `urls` (one URL per line) and `message_limit`.
+        """
+        payload = request.get_json(silent=True)
+        if payload is not None:
+            urls = payload.get('urls') or []
+            message_limit_value = payload.get('message_limit')
+            message_limit = parse_message_limit(str(message_limit_value) if message_limit_value is not None else None)
+        else:
+            urls = (request.form.get('urls') or '').split()
+            message_limit = parse_message_limit(request.form.get('message_limit'))
+
+        if not isinstance(urls, list) or not urls:
+            return jsonify({'error': "Please provide a list of Telegram URLs."}), 400
+        if len(urls) > MULTI_CHANNEL_MAX_URLS:
+            return jsonify({'error': f"Too many URLs: at most {MULTI_CHANNEL_MAX_URLS} channels can be analyzed per request."}), 400
+
+        url_infos = []
+        for url in urls:
+            url_info = await parse_telegram_url(url) if isinstance(url, str) else {'type': 'invalid'}
+            url_info['original_url'] = url
+            url_infos.append(url_info)
+
+        multi_results = await app.config['ANALYSIS_SERVICE'].analyze_many(url_infos, message_limit)
+        return jsonify(multi_results)
+
+    @app.route('/analyze/trends', methods=['POST'])
+    async def analyze_trends():
+        """
+        Returns a channel/group's label histogram per day or week as JSON, updated with the messages posted
+        since the previous request. Accepts a JSON body {"url": ..., "granularity": "day"|"week", "message_limit": ...}
+        or the same form fields.
+        """
+        payload = request.get_json(silent=True)
+        if payload is None:
+            payload = request.form
+        url = payload.get('url')
+        granularity = payload.get('granularity') or 'day'
+        message_limit_value = payload.get('message_limit')
+        message_limit = parse_message_limit(str(message_limit_value)) if message_limit_value is not None else TREND_MESSAGE_LIMIT
+
+        if not isinstance(url, str) or not url:
+            return jsonify({'error': "Please provide a Telegram URL."}), 400
+        if granularity not in GRANULARITIES:
+            return jsonify({'error': f"Unknown granularity '{granularity}'. Use one of: {', '.join(GRANULARITIES)}."}), 400
+
+        url_info = await parse_telegram_url(url)
+        url_info['original_url'] = url
+        trend_results = await app.config['ANALYSIS_SERVICE'].analyze_trends(url_info, granularity, message_limit)
+        return jsonify(trend_results)
+
+    def admin_authorized():
+        token = request.headers.get('X-Admin-Token', '')
+        return bool(MODEL_ADMIN_TOKEN) and hmac.compare_digest(token.encode(), MODEL_ADMIN_TOKEN.encode())
+
+    @app.route('/admin/model', methods=['GET'])
+    def model_status():
+        """Reports the model version this worker serves and the versions in the manifest."""
+        if not admin_authorized():
+            return jsonify({'error': ADMIN_FORBIDDEN_MESSAGE}), 403
+        return jsonify(app.config['MODEL_RELOADER'].status())
+
+    @app.route('/admin/model/reload', methods=['POST'])
+    def reload_model():
+        """
+        Loads, smoke-tests and swaps in a model version in this worker: the manifest's active version, or
+        {"version": "..."} from the JSON body. In-flight analyses finish on the previous version.
+        """
+        if not admin_authorized():
+            return jsonify({'error': ADMIN_FORBIDDEN_MESSAGE}), 403
+        version = (request.get_json(silent=True) or {}).get('version')
+        try:
+            reload_info = app.config['MODEL_RELOADER'].reload(version)
+        except Exception as e:
+            return jsonify({'error': f"Model reload failed, still serving version '{app.config['ANALYSIS_SERVICE'].backend.version}': {e}"}), 500
+        return jsonify(reload_info)
+
+    @app.route('/admin/shadow', methods=['GET'])
+    def shadow_report():
+        """Agreement and latency of the shadow candidate against the served model in this worker (?reset=1 clears them)."""
+        if not admin_authorized():
+            return jsonify({'error': ADMIN_FORBIDDEN_MESSAGE}), 403
+        shadow = app.config['ANALYSIS_SERVICE'].shadow
+        if shadow is None:
+            return jsonify({'error': "Shadow evaluation is disabled. Set SHADOW_MODEL_VERSION to a published model version."}), 404
+        report = shadow.report()
+        if request.args.get('reset') == '1':
+            shadow.reset()
+        return jsonify(report)
+
+    return app
 
-    return render_template('results.html', results=analysis_results)
 
 # --- Application Startup ---
-load_model_and_vectorizer()
+# Module-level app so `gunicorn app:app` (and `server:app`) keep working. The shadow evaluator's spawned
+# process re-imports the launching module (`python app.py` / `python server.py`) but only runs inference,
+# so no app (second model load, reloader thread, caches) is built there.
+app = create_app() if multiprocessing.current_process().name == 'MainProcess' else None
 
-# NO global Telethon client connection at startup needed anymore
 # Telethon client lifecycle is managed per request within _run_telethon_client_task
 
 if __name__ == '__main__':
     print("Starting Flask application...", file=sys.stderr)
-    app.run(debug=False, host='0.0.0.0', port=os.environ.get('PORT', 5000))
\ No newline at end of file
+    app.run(debug=False, host='0.0.0.0', port=os.environ.get('PORT', 5000))
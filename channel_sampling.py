@@ -0,0 +1,89 @@
+from statistics import NormalDist
+import numpy as np
+
+from config import SAMPLING_CONFIDENCE
+
+
+class BlockProportionEstimator:
+    """
+    Estimates the share of each label among all sentences of a channel from a random sample of message
+    blocks (see telegram_scraper.sample_channel_or_group_content).
+    Blocks are drawn without replacement, and sentences within a block are not independent: a thread
+    or a burst of posts tends to share a label. Each block is therefore one cluster. The proportion is
+    the ratio estimator sum(label sentences) / sum(sentences) over sampled blocks. Its variance is the
+    linearised cluster variance with a finite population correction, so the interval shrinks to zero
+    once every block has been read.
+    """
+
+    def __init__(self, labels, total_blocks, confidence=SAMPLING_CONFIDENCE):
+        self.labels = list(labels)
+        self.total_blocks = total_blocks
+        self.confidence = confidence
+        self._z = NormalDist().inv_cdf((1 + confidence) / 2)
+        self._block_counts = np.zeros((0, len(self.labels)), dtype=np.int64)
+
+    @property
+    def blocks_sampled(self):
+        return len(self._block_counts)
+
+    @property
+    def sentences_sampled(self):
+        return int(self._block_counts.sum())
+
+    def add_blocks(self, block_label_counts):
+        """Adds sampled blocks: a (n_blocks, n_labels) array of sentence counts per label, zero rows included."""
+        self._block_counts = np.vstack([self._block_counts, np.asarray(block_label_counts, dtype=np.int64)])
+
+    def estimates(self):
+        """
+        Returns {label: (proportion, interval low, interval high)}; the bounds are None while fewer than
+        two blocks with sentences have been sampled.
+        """
+        block_sizes = self._block_counts.sum(axis=1)
+        total = block_sizes.sum()
+        if total == 0:
+            return {label: (None, None, None) for label in self.labels}
+
+        proportions = self._block_counts.sum(axis=0) / total
+        m = self.blocks_sampled
+        if m < 2:
+            return {label: (float(p), None, None) for label, p in zip(self.labels, proportions)}
+
+        residuals = self._block_counts - np.outer(block_sizes, proportions)
+        mean_block_size = total / m
+        finite_population_correction = max(0.0, 1 - m / self.total_blocks) if self.total_blocks else 0.0
+        variances = finite_population_correction * (residuals ** 2).sum(axis=0) / (m - 1) / (m * mean_block_size ** 2)
+        half_widths = self._z * np.sqrt(variances)
+        return {label: (float(p), float(max(0.0, p - h)), float(min(1.0, p + h)))
+                for label, p, h in zip(self.labels, proportions, half_widths)}
+
+    def interval_widths(self, labels=None):
+        """Full interval width for each of labels (all by default); inf while it cannot be computed yet."""
+        estimates = self.estimates()
+        return {label: (high - low if high is not None else float('inf'))
+                for label, (_, low, high) in estimates.items() if labels is None or label in labels}
+
+    def converged(self, target_width, labels, min_blocks=0):
+        """True once at least min_blocks blocks were sampled and every label's interval is at most target_width wide."""
+        if self.blocks_sampled < min_blocks:
+            return False
+        return all(width <= target_width for width in self.interval_widths(labels).values())
+
+
+if __name__ == "__main__":
+    # Simulated channel: 5000 blocks whose hate rate varies from block to block.
+    rng = np.random.default_rng(0)
+    block_hate_rates = rng.beta(1, 12, size=5000)
+    block_sentences = rng.poisson(30, size=5000)
+    hate = rng.binomial(block_sentences, block_hate_rates)
+    counts = np.column_stack([hate, block_sentences - hate])
+    true_rate = hate.sum() / block_sentences.sum()
+
+    estimator = BlockProportionEstimator(['hate', 'other'], total_blocks=len(counts))
+    order = rng.permutation(len(counts))
+    for start in range(0, len(order), 10):
+        estimator.add_blocks(counts[order[start:start + 10]])
+        if estimator.converged(0.02, ['hate'], min_blocks=20):
+            break
+    p, low, high = estimator.estimates()['hate']
+    print(f"true {true_rate:.4f}  estimate {p:.4f} [{low:.4f}, {high:.4f}] from {estimator.blocks_sampled} of {len(counts)} blocks")
@@ -6,6 +6,19 @@ TELEGRAM_API_HASH = os.environ.get('TELEGRAM_API_HASH')
 # New: Telegram session string to avoid interactive login on server
 TELEGRAM_SESSION_STRING = os.environ.get('TELEGRAM_SESSION_STRING')
 TELEGRAM_SESSION_NAME = 'amharic_hate_speech_session' # Still used for local session generation/testing
+# Client the scraper talks to: 'telethon' (real Telegram) or 'fake' (fake_telegram.py, synthetic channels
+# served in-process for offline load and concurrency tests; no credentials or network needed).
+TELEGRAM_CLIENT_BACKEND = os.environ.get('TELEGRAM_CLIENT_BACKEND', 'telethon')
+
+# --- Fake Telegram Backend ---
+# Simulated round-trip time of every fake API request, and the share of history/comment requests that fail
+# with FloodWaitError(FAKE_TELEGRAM_FLOOD_WAIT_SECONDS) before being retried.
+FAKE_TELEGRAM_LATENCY_MS = float(os.environ.get('FAKE_TELEGRAM_LATENCY_MS', 50))
+FAKE_TELEGRAM_FLOOD_WAIT_RATE = float(os.environ.get('FAKE_TELEGRAM_FLOOD_WAIT_RATE', 0.0))
+FAKE_TELEGRAM_FLOOD_WAIT_SECONDS = int(os.environ.get('FAKE_TELEGRAM_FLOOD_WAIT_SECONDS', 0))
+# Messages per synthetic channel; channel contents are derived from FAKE_TELEGRAM_SEED and the channel name.
+FAKE_TELEGRAM_MESSAGES = int(os.environ.get('FAKE_TELEGRAM_MESSAGES', 2000))
+FAKE_TELEGRAM_SEED = int(os.environ.get('FAKE_TELEGRAM_SEED', 0))
 
 # --- Model Paths ---
 MODEL_DIR = 'models'
@@ -14,5 +27,95 @@ MODEL_PATH = os.path.join(MODEL_DIR, 'amharic_hate_speech_model.pkl')
 
 os.makedirs(MODEL_DIR, exist_ok=True)
 
+# --- Versioned Models ---
+# model_trainer.py publishes every trained model under MODEL_VERSIONS_DIR/<version>/ and records it in the
+# manifest, whose 'active' entry is the version served. Without a manifest the paths above are served.
+MODEL_VERSIONS_DIR = os.path.join(MODEL_DIR, 'versions')
+MODEL_MANIFEST_PATH = os.path.join(MODEL_DIR, 'manifest.json')
+# Every worker checks the manifest this often and hot-swaps to a newly activated version (0 disables).
+MODEL_RELOAD_POLL_SECONDS = int(os.environ.get('MODEL_RELOAD_POLL_SECONDS', 30))
+# Token expected in the X-Admin-Token header of the /admin/model endpoints; they are disabled when unset.
+MODEL_ADMIN_TOKEN = os.environ.get('MODEL_ADMIN_TOKEN')
+
+# --- Preprocessing ---
+# Strip attached clitics (e.g. the 'የ'/'በ'/'ለ'/'ከ' prefixes) and filter normalized stopwords in one pass
+# (amharic_preprocessing.strip_amharic_token). Changes the model's features: retrain with the same setting.
+AMHARIC_CLITIC_STRIPPING = os.environ.get('AMHARIC_CLITIC_STRIPPING', '0') == '1'
+
 # --- Dataset Label Mapping ---
-LABEL_MAPPING = {0: 'normal', 1: 'hate', 2: 'offensive'}
\ No newline at end of file
+LABEL_MAPPING = {0: 'normal', 1: 'hate', 2: 'offensive'}
+
+# --- Inference Backend ---
+# Selects which engine AnalysisService uses to classify sentences (see inference.py).
+INFERENCE_BACKEND = os.environ.get('INFERENCE_BACKEND', 'sklearn')
+
+# --- Analysis Result Cache ---
+# Results of /analyze are cached per (parsed URL, message limit). Once older than the TTL a
+# cached result is still served immediately while a background refresh replaces it.
+RESULT_CACHE_ENABLED = os.environ.get('RESULT_CACHE_ENABLED', '1') != '0'
+RESULT_CACHE_PATH = os.environ.get('RESULT_CACHE_PATH', os.path.join('cache', 'analysis_results.sqlite3'))
+# The background refresh re-runs the whole analysis (scraping message_limit messages again), so a short TTL
+# on a busy channel costs a full scrape per refresh; /analyze/trends updates incrementally instead.
+RESULT_CACHE_TTL_SECONDS = int(os.environ.get('RESULT_CACHE_TTL_SECONDS', 15 * 60))
+
+# --- Multi-Channel Analysis ---
+# Upper bounds for the /analyze/multi endpoint: channels scraped at once across all requests in the
+# process (each gunicorn worker has its own limit), and channels accepted per request.
+MULTI_CHANNEL_MAX_CONCURRENCY = int(os.environ.get('MULTI_CHANNEL_MAX_CONCURRENCY', 4))
+MULTI_CHANNEL_MAX_URLS = int(os.environ.get('MULTI_CHANNEL_MAX_URLS', 50))
+
+# --- Near-Duplicate Collapsing ---
+# Near-identical sentences (spam floods, copy-paste campaigns) are clustered with MinHash/LSH and only one
+# representative per cluster is classified. Threshold is the estimated Jaccard similarity of character shingles.
+# Off by default: clustering costs more per sentence than the linear model it saves (`python near_duplicates.py`),
+# so enable it for the near-duplicate report on the results page rather than for speed.
+NEAR_DUPLICATE_COLLAPSE_ENABLED = os.environ.get('NEAR_DUPLICATE_COLLAPSE_ENABLED', '0') == '1'
+NEAR_DUPLICATE_THRESHOLD = float(os.environ.get('NEAR_DUPLICATE_THRESHOLD', 0.8))
+
+# --- Chunked Inference ---
+# Sentences are vectorized and classified in chunks sized to hold roughly this many sparse non-zeros,
+# so peak memory stays flat for `message_limit=all` instead of growing with the number of sentences.
+INFERENCE_CHUNK_TARGET_NNZ = int(os.environ.get('INFERENCE_CHUNK_TARGET_NNZ', 500000))
+INFERENCE_CHUNK_MIN_SENTENCES = 256
+INFERENCE_CHUNK_MAX_SENTENCES = 65536
+# With a sentence sink (analysis export, trend counts), sentences are classified and handed to the sink in
+# batches of this many, so e.g. export rows are written as each batch completes.
+SENTENCE_SINK_BATCH_SENTENCES = 50000
+
+# --- Analysis Export ---
+# When enabled, every analysis also writes its per-sentence predictions (ids, offsets, preprocessed text,
+# label, probabilities) to ANALYSIS_EXPORT_DIR as Parquet or Arrow IPC ('parquet' or 'arrow').
+ANALYSIS_EXPORT_ENABLED = os.environ.get('ANALYSIS_EXPORT_ENABLED', '0') == '1'
+ANALYSIS_EXPORT_DIR = os.environ.get('ANALYSIS_EXPORT_DIR', 'exports')
+ANALYSIS_EXPORT_FORMAT = os.environ.get('ANALYSIS_EXPORT_FORMAT', 'parquet')
+ANALYSIS_EXPORT_BATCH_ROWS = 50000
+
+# --- Shadow Evaluation ---
+# Runs a candidate model version (see model_registry.py) next to the served one on a sample of live batches,
+# in a separate low-priority process after the response is computed, and reports label agreement and latency (/admin/shadow).
+SHADOW_MODEL_VERSION = os.environ.get('SHADOW_MODEL_VERSION')
+SHADOW_SAMPLE_RATE = float(os.environ.get('SHADOW_SAMPLE_RATE', 0.1))
+# Sampled batches waiting for the candidate beyond this are dropped instead of queued.
+SHADOW_MAX_PENDING_BATCHES = int(os.environ.get('SHADOW_MAX_PENDING_BATCHES', 4))
+
+# --- Sampled Estimation ---
+# Instead of the most recent messages, a channel can be estimated as a whole: random blocks of
+# SAMPLING_BLOCK_MESSAGES consecutive message ids are read across its history, SAMPLING_BLOCKS_PER_ROUND
+# at a time, until the hate and offensive proportions are known to within the requested confidence-interval
+# width (full width, as a fraction) or SAMPLING_MAX_MESSAGES messages have been read.
+# SAMPLING_CI_WIDTH is the width used when the form's estimate field is 'default'.
+SAMPLING_CI_WIDTH = float(os.environ.get('SAMPLING_CI_WIDTH', 0.05))
+SAMPLING_CONFIDENCE = float(os.environ.get('SAMPLING_CONFIDENCE', 0.95))
+SAMPLING_BLOCK_MESSAGES = int(os.environ.get('SAMPLING_BLOCK_MESSAGES', 20))
+SAMPLING_BLOCKS_PER_ROUND = int(os.environ.get('SAMPLING_BLOCKS_PER_ROUND', 10))
+# Intervals from fewer blocks than this are too unreliable to stop on.
+SAMPLING_MIN_BLOCKS = int(os.environ.get('SAMPLING_MIN_BLOCKS', 20))
+SAMPLING_MAX_MESSAGES = int(os.environ.get('SAMPLING_MAX_MESSAGES', 20000))
+
+# --- Trends ---
+# Daily label counts per channel, kept in a local SQLite store so repeated trend requests only scrape and
+# classify the messages posted since the previous one (see trend_store.py and /analyze/trends).
+TREND_STORE_ENABLED = os.environ.get('TREND_STORE_ENABLED', '1') != '0'
+TREND_STORE_PATH = os.environ.get('TREND_STORE_PATH', os.path.join('cache', 'trends.sqlite3'))
+# Messages read per trend request: the newest ones on the first request, then the next ones after the stored watermark.
+TREND_MESSAGE_LIMIT = int(os.environ.get('TREND_MESSAGE_LIMIT', 5000))
@@ -0,0 +1,255 @@
+import asyncio
+import datetime
+import random
+import threading
+import zlib
+from types import SimpleNamespace
+
+from telethon.errors.rpcerrorlist import FloodWaitError, PeerIdInvalidError, ChannelPrivateError
+from telethon.tl.functions.channels import GetMessagesRequest
+from telethon.tl.types import Channel, ChatPhotoEmpty
+
+from config import (
+    FAKE_TELEGRAM_LATENCY_MS, FAKE_TELEGRAM_FLOOD_WAIT_RATE, FAKE_TELEGRAM_FLOOD_WAIT_SECONDS, FAKE_TELEGRAM_MESSAGES,
+    FAKE_TELEGRAM_SEED,
+)
+
+# Telethon reads history in pages of up to 100 messages, one API request per page.
+PAGE_SIZE = 100
+NORMAL_WORDS = ["ሰላም", "ዛሬ", "ጥሩ", "ቀን", "ነው", "መንግስት", "ሀገር", "ህዝብ", "ትምህርት", "ስራ", "ዜና", "ከተማ", "ውሃ", "ቤት", "ገበያ", "ልጆች"]
+TOXIC_WORDS = ["ደደብ", "ሌባ", "ውሸታም", "ጠላት", "ግደሉ", "ጥላቻ", "አረመኔ", "ከሃዲ"]
+# Identifiers with these prefixes fail to resolve, to exercise the error paths.
+MISSING_PREFIX = 'missing'
+PRIVATE_PREFIX = 'private'
+# Every channel starts on this date and posts every MESSAGE_INTERVAL; ids with a deleted message are skipped.
+FIRST_MESSAGE_DATE = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+MESSAGE_INTERVAL = datetime.timedelta(hours=1)
+DELETED_RATE = 0.1
+COMMENTED_RATE = 0.3
+MAX_COMMENTS = 8
+# Comment ids in a discussion group: post id * COMMENT_ID_STRIDE + comment number.
+COMMENT_ID_STRIDE = 1000
+
+
+class FakeChannel:
+    """
+    A synthetic channel and its linked discussion group. Every message is derived from (seed, channel,
+    message id) alone, so any id can be served in O(1) without materialising the history and the
+    same channel looks the same in every process.
+    """
+
+    def __init__(self, name, seed, message_count):
+        self.name = name
+        self.seed = seed
+        self.message_count = message_count
+        channel_id = zlib.crc32(f"{seed}:{name}".encode()) & 0x3FFFFFFF
+        # Channels differ in how toxic they are, so label distributions vary across a load test.
+        self.toxic_rate = random.Random(channel_id).uniform(0.0, 0.3)
+        self.entity = Channel(id=channel_id, title=name, photo=ChatPhotoEmpty(), date=FIRST_MESSAGE_DATE,
+                              broadcast=True, username=name, access_hash=channel_id)
+        self.discussion_group = Channel(id=channel_id + 0x40000000, title=f"{name} Chat", photo=ChatPhotoEmpty(),
+                                        date=FIRST_MESSAGE_DATE, megagroup=True, access_hash=channel_id)
+        # Not a field of the Channel type; telegram_scraper reads it to find the discussion group.
+        self.entity.linked_chat_id = self.discussion_group.id
+
+    def _random(self, *key):
+        return random.Random(f"{self.seed}:{self.name}:{':'.join(map(str, key))}")
+
+    def _text(self, rng):
+        sentences = []
+        for _ in range(rng.randint(1, 3)):
+            words = [rng.choice(TOXIC_WORDS) if rng.random() < self.toxic_rate else rng.choice(NORMAL_WORDS)
+                     for _ in range(rng.randint(4, 10))]
+            sentences.append(" ".join(words) + "።")
+        if rng.random() < 0.1:
+            sentences.append("https://t.me/" + self.name)
+        return " ".join(sentences)
+
+    def message(self, message_id):
+        """The post with this id, or None if it is out of range or was deleted."""
+        if not 1 <= message_id <= self.message_count:
+            return None
+        rng = self._random(message_id)
+        if rng.random() < DELETED_RATE:
+            return None
+        return SimpleNamespace(id=message_id, text=self._text(rng), date=FIRST_MESSAGE_DATE + (message_id - 1) * MESSAGE_INTERVAL)
+
+    def comments(self, message_id):
+        """The discussion-group replies to a post, oldest first."""
+        post = self.message(message_id)
+        rng = self._random(message_id, 'comments')
+        if post is None or rng.random() >= COMMENTED_RATE:
+            return []
+        return [SimpleNamespace(id=message_id * COMMENT_ID_STRIDE + k, text=self._text(rng),
+                                date=post.date + datetime.timedelta(minutes=5 * (k + 1)))
+                for k in range(rng.randint(1, MAX_COMMENTS))]
+
+
+class FakeMessageIter:
+    """
+    Async iterator with the iter_messages semantics the scraper relies on (limit, offset_id, min_id, reverse).
+    Like Telethon's, it fetches a page per simulated request and is resumable: after a FloodWaitError the
+    next __anext__ retries the same page.
+    """
+
+    def __init__(self, client, message_ids, lookup, limit):
+        self._client = client
+        self._message_ids = message_ids
+        self._lookup = lookup
+        self._limit = limit
+        self._buffer = []
+        self._returned = 0
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self._limit is not None and self._returned >= self._limit:
+            raise StopAsyncIteration
+        if not self._buffer:
+            await self._client._request(floodable=True)
+            for message_id in self._message_ids:
+                message = self._lookup(message_id)
+                if message is not None:
+                    self._buffer.append(message)
+                    if len(self._buffer) >= PAGE_SIZE:
+                        break
+            self._buffer.reverse()
+            if not self._buffer:
+                raise StopAsyncIteration
+        self._returned += 1
+        return self._buffer.pop()
+
+
+class FakeTelegramClient:
+    """
+    In-process stand-in for TelegramClient (TELEGRAM_CLIENT_BACKEND=fake), implementing the methods that
+    telegram_scraper uses. Any identifier resolves to a deterministic FakeChannel of message_count posts
+    with a linked discussion group, except names starting with MISSING_PREFIX / PRIVATE_PREFIX, which fail.
+    Every API request waits latency_ms; history and comment requests fail with FloodWaitError at
+    flood_wait_rate. Request counters are shared by all clients in the process (see stats()), so a load
+    test can see how many requests were in flight at once.
+    """
+
+    _stats_lock = threading.Lock()
+    _stats = {'clients': 0, 'requests': 0, 'flood_waits': 0, 'in_flight': 0, 'peak_in_flight': 0}
+
+    def __init__(self, latency_ms=FAKE_TELEGRAM_LATENCY_MS, flood_wait_rate=FAKE_TELEGRAM_FLOOD_WAIT_RATE,
+                 flood_wait_seconds=FAKE_TELEGRAM_FLOOD_WAIT_SECONDS, message_count=FAKE_TELEGRAM_MESSAGES,
+                 seed=FAKE_TELEGRAM_SEED):
+        self.latency = latency_ms / 1000
+        self.flood_wait_rate = flood_wait_rate
+        self.flood_wait_seconds = flood_wait_seconds
+        self.message_count = message_count
+        self.seed = seed
+        self._random = random.Random(seed)
+        self._channels = {}
+        self._connected = False
+
+    @classmethod
+    def stats(cls):
+        with cls._stats_lock:
+            return dict(cls._stats)
+
+    @classmethod
+    def reset_stats(cls):
+        with cls._stats_lock:
+            cls._stats.update({name: 0 for name in cls._stats})
+
+    async def _request(self, floodable=False):
+        with self._stats_lock:
+            self._stats['requests'] += 1
+            self._stats['in_flight'] += 1
+            self._stats['peak_in_flight'] = max(self._stats['peak_in_flight'], self._stats['in_flight'])
+        try:
+            await asyncio.sleep(self.latency)
+        finally:
+            with self._stats_lock:
+                self._stats['in_flight'] -= 1
+        if floodable and self._random.random() < self.flood_wait_rate:
+            with self._stats_lock:
+                self._stats['flood_waits'] += 1
+            raise FloodWaitError(request=None, capture=self.flood_wait_seconds)
+
+    def _channel(self, name):
+        channel = self._channels.get(name)
+        if channel is None:
+            channel = self._channels[name] = FakeChannel(name, self.seed, self.message_count)
+        return channel
+
+    def _channel_of(self, entity):
+        for channel in self._channels.values():
+            if entity.id in (channel.entity.id, channel.discussion_group.id):
+                return channel
+        raise PeerIdInvalidError(request=None)
+
+    async def start(self):
+        await self._request()
+        self._connected = True
+        with self._stats_lock:
+            self._stats['clients'] += 1
+        return self
+
+    async def is_user_authorized(self):
+        return True
+
+    def is_connected(self):
+        return self._connected
+
+    async def disconnect(self):
+        self._connected = False
+
+    async def get_entity(self, identifier):
+        await self._request()
+        if isinstance(identifier, int):
+            for channel in self._channels.values():
+                if identifier == channel.entity.id:
+                    return channel.entity
+                if identifier == channel.discussion_group.id:
+                    return channel.discussion_group
+            raise PeerIdInvalidError(request=None)
+        name = str(identifier).lstrip('@')
+        if name.startswith(MISSING_PREFIX):
+            raise PeerIdInvalidError(request=None)
+        if name.startswith(PRIVATE_PREFIX):
+            raise ChannelPrivateError(request=None)
+        return self._channel(name).entity
+
+    def iter_messages(self, entity, limit=None, offset_id=0, min_id=0, max_id=0, reverse=False, reply_to=None):
+        channel = self._channel_of(entity)
+        if reply_to is not None:
+            # Replies live in the discussion group; asking the channel itself returns the same thread, as on Telegram.
+            return FakeMessageIter(self, iter(channel.comments(reply_to)), lambda comment: comment, limit)
+        if entity.id == channel.discussion_group.id:
+            return FakeMessageIter(self, iter(()), channel.message, limit)
+
+        upper = channel.message_count + 1
+        for bound in (offset_id if not reverse else 0, max_id):
+            if bound:
+                upper = min(upper, bound)
+        lower = max(min_id, offset_id if reverse else 0)
+        message_ids = range(lower + 1, upper) if reverse else range(upper - 1, lower, -1)
+        return FakeMessageIter(self, iter(message_ids), channel.message, limit)
+
+    async def __call__(self, request):
+        await self._request()
+        if isinstance(request, GetMessagesRequest):
+            channel = self._channel_of(request.channel)
+            return SimpleNamespace(messages=[message for message in map(channel.message, request.id) if message is not None])
+        raise NotImplementedError(f"FakeTelegramClient does not implement {type(request).__name__}")
+
+
+# Example usage: scrape one synthetic channel through the real scraper code.
+if __name__ == "__main__":
+    import time
+    import fake_telegram
+    import telegram_scraper
+
+    telegram_scraper.TELEGRAM_CLIENT_BACKEND = 'fake'
+    start = time.perf_counter()
+    corpus, messages_with_comments, comments = asyncio.run(telegram_scraper.get_channel_or_group_content('fake_channel', 500))
+    elapsed = time.perf_counter() - start
+    print(f"{corpus.message_count} messages, {messages_with_comments} with comments, {comments} comments in {elapsed:.2f}s")
+    # The scraper's copy of this module (fake_telegram), not __main__, did the counting.
+    print(fake_telegram.FakeTelegramClient.stats())
+    print(corpus[0])
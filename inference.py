@@ -0,0 +1,211 @@
+import sys
+import joblib
+import numpy as np
+
+from config import (
+    VECTORIZER_PATH, MODEL_PATH, INFERENCE_BACKEND,
+    INFERENCE_CHUNK_TARGET_NNZ, INFERENCE_CHUNK_MIN_SENTENCES, INFERENCE_CHUNK_MAX_SENTENCES, AMHARIC_CLITIC_STRIPPING,
+)
+from model_registry import read_manifest, resolve_model_paths, compact_model_path
+
+
+class InferenceBackend:
+    """
+    Interface for the engine that turns preprocessed sentences into label ids.
+    AnalysisService only talks to this interface, so a faster engine can be
+    swapped in through config.INFERENCE_BACKEND without touching the routes.
+    """
+    name = 'base'
+    # Numeric label ids in the column order of predict_proba.
+    classes = None
+    # Model version (see model_registry.py) the backend was loaded from; results are tagged with it.
+    version = None
+
+    def predict(self, processed_sentences):
+        """Returns a numpy array of numeric label ids, one per sentence (empty if nothing could be classified)."""
+        raise NotImplementedError
+
+    def predict_proba(self, processed_sentences):
+        """Returns an (n_sentences, n_labels) array of class probabilities."""
+        raise NotImplementedError
+
+    def predict_with_proba(self, processed_sentences):
+        """Returns (label ids, probabilities) from a single pass; both are empty if nothing could be classified."""
+        probabilities = self.predict_proba(processed_sentences)
+        return self.classes[probabilities.argmax(axis=1)], probabilities
+
+
+class SklearnBackend(InferenceBackend):
+    """
+    Runs the pickled TF-IDF vectorizer and scikit-learn classifier produced by model_trainer.py.
+    Sentences are vectorized and classified chunk by chunk, with the chunk size adapted so each chunk's
+    sparse matrix holds about target_chunk_nnz non-zeros; results go into preallocated output arrays.
+    """
+    name = 'sklearn'
+
+    def __init__(self, vectorizer, model, target_chunk_nnz=INFERENCE_CHUNK_TARGET_NNZ):
+        self.vectorizer = vectorizer
+        self.model = model
+        self.classes = model.classes_
+        self.target_chunk_nnz = target_chunk_nnz
+        # Linear models are scored directly from their weights (same result as model.predict, without
+        # the per-call input validation); anything else falls back to model.predict.
+        if hasattr(model, 'coef_') and hasattr(model, 'intercept_'):
+            self._coef_t = np.ascontiguousarray(model.coef_.T)
+            self._intercept = np.asarray(model.intercept_)
+        else:
+            self._coef_t = None
+
+    @classmethod
+    def from_paths(cls, vectorizer_path=VECTORIZER_PATH, model_path=MODEL_PATH):
+        return cls(joblib.load(vectorizer_path), joblib.load(model_path))
+
+    def _iter_chunks(self, processed_sentences):
+        """Yields (start, end, sentence_vectors), resizing each chunk from the nnz/sentence seen in the previous one."""
+        n_sentences = len(processed_sentences)
+        chunk_size = INFERENCE_CHUNK_MIN_SENTENCES
+        start = 0
+        while start < n_sentences:
+            end = min(start + chunk_size, n_sentences)
+            sentence_vectors = self.vectorizer.transform(processed_sentences[start:end])
+            yield start, end, sentence_vectors
+            nnz_per_sentence = max(sentence_vectors.nnz / (end - start), 1.0)
+            chunk_size = int(min(max(self.target_chunk_nnz / nnz_per_sentence, INFERENCE_CHUNK_MIN_SENTENCES),
+                                 INFERENCE_CHUNK_MAX_SENTENCES))
+            start = end
+
+    def _scores_into(self, sentence_vectors, out):
+        """Writes the linear decision scores of a chunk into out, a slice of a buffer allocated once per call."""
+        np.add(sentence_vectors @ self._coef_t, self._intercept, out=out)
+        return out
+
+    def _predict_chunk(self, sentence_vectors, scores_buffer):
+        if self._coef_t is None:
+            return self.model.predict(sentence_vectors)
+        scores = self._scores_into(sentence_vectors, scores_buffer[:sentence_vectors.shape[0]])
+        if scores.shape[1] == 1:
+            return self.classes[(scores[:, 0] > 0).astype(np.intp)]
+        return self.classes[scores.argmax(axis=1)]
+
+    def _predict_proba_chunk(self, sentence_vectors, out):
+        """Writes the chunk's class probabilities into out, a slice of the caller's output array."""
+        out[:] = self.model.predict_proba(sentence_vectors)
+
+    def predict(self, processed_sentences):
+        labels = np.empty(len(processed_sentences), dtype=self.classes.dtype)
+        scores_buffer = None
+        if self._coef_t is not None:
+            max_chunk = max(INFERENCE_CHUNK_MIN_SENTENCES, INFERENCE_CHUNK_MAX_SENTENCES)
+            scores_buffer = np.empty((min(len(processed_sentences), max_chunk), self._coef_t.shape[1]), dtype=np.float64)
+        total_nnz = 0
+        for start, end, sentence_vectors in self._iter_chunks(processed_sentences):
+            total_nnz += sentence_vectors.nnz
+            labels[start:end] = self._predict_chunk(sentence_vectors, scores_buffer)
+        if total_nnz == 0:
+            return np.empty(0, dtype=np.int64)
+        return labels
+
+    def predict_proba(self, processed_sentences):
+        probabilities = np.empty((len(processed_sentences), len(self.classes)), dtype=np.float64)
+        for start, end, sentence_vectors in self._iter_chunks(processed_sentences):
+            self._predict_proba_chunk(sentence_vectors, probabilities[start:end])
+        return probabilities
+
+    def predict_with_proba(self, processed_sentences):
+        probabilities = np.empty((len(processed_sentences), len(self.classes)), dtype=np.float64)
+        total_nnz = 0
+        for start, end, sentence_vectors in self._iter_chunks(processed_sentences):
+            total_nnz += sentence_vectors.nnz
+            self._predict_proba_chunk(sentence_vectors, probabilities[start:end])
+        if total_nnz == 0:
+            return np.empty(0, dtype=np.int64), np.empty((0, len(self.classes)), dtype=np.float64)
+        return self.classes[probabilities.argmax(axis=1)], probabilities
+
+
+class CompactLinearBackend(SklearnBackend):
+    """
+    Runs the pruned and quantized linear model written by `model_trainer.py --export-compact` next to the
+    model it was derived from. Its vectorizer only knows the vocabulary that kept a non-zero weight, and the
+    weights are stored sparse as int8 (or float32) with one scale per class; they are dequantized once at
+    load, so each chunk is scored with a single sparse x dense product over the pruned vocabulary.
+    """
+    name = 'compact_linear'
+
+    def __init__(self, compact_model, target_chunk_nnz=INFERENCE_CHUNK_TARGET_NNZ):
+        self.vectorizer = compact_model['vectorizer']
+        self.model = None
+        self.classes = compact_model['classes']
+        self.target_chunk_nnz = target_chunk_nnz
+        weights = compact_model['weights']
+        self._coef_t = np.ascontiguousarray(weights.toarray().astype(np.float32) * compact_model['scales'])
+        self._intercept = compact_model['intercept']
+
+    @classmethod
+    def from_paths(cls, vectorizer_path=VECTORIZER_PATH, model_path=MODEL_PATH):
+        return cls(joblib.load(compact_model_path(model_path)))
+
+    def _predict_proba_chunk(self, sentence_vectors, out):
+        # Same link functions as LogisticRegression.predict_proba: logistic for two classes, softmax otherwise.
+        # Both are computed in place in out, so a chunk allocates no score arrays of its own.
+        if self._coef_t.shape[1] == 1:
+            positive = self._scores_into(sentence_vectors, out[:, 1:])
+            np.negative(positive, out=positive)
+            np.exp(positive, out=positive)
+            positive += 1.0
+            np.reciprocal(positive, out=positive)
+            np.subtract(1.0, positive, out=out[:, :1])
+            return
+        scores = self._scores_into(sentence_vectors, out)
+        scores -= scores.max(axis=1, keepdims=True)
+        np.exp(scores, out=scores)
+        scores /= scores.sum(axis=1, keepdims=True)
+
+
+# --- Backend Registry ---
+# Maps the INFERENCE_BACKEND config value to a backend class exposing from_paths().
+INFERENCE_BACKENDS = {
+    SklearnBackend.name: SklearnBackend,
+    CompactLinearBackend.name: CompactLinearBackend,
+}
+
+
+def load_inference_backend(backend_name=INFERENCE_BACKEND, version=None):
+    """Instantiates the configured inference backend from a model version in MODEL_DIR (the active one by default)."""
+    backend_cls = INFERENCE_BACKENDS.get(backend_name)
+    if backend_cls is None:
+        raise ValueError(f"Unknown inference backend '{backend_name}'. Available: {', '.join(sorted(INFERENCE_BACKENDS))}")
+    version, vectorizer_path, model_path = resolve_model_paths(version)
+    backend = backend_cls.from_paths(vectorizer_path, model_path)
+    backend.version = version
+    version_info = (read_manifest() or {}).get('versions', {}).get(version, {})
+    if version_info.get('clitic_stripping', False) != AMHARIC_CLITIC_STRIPPING:
+        print(f"Warning: model version '{version}' was trained with AMHARIC_CLITIC_STRIPPING="
+              f"{'1' if version_info.get('clitic_stripping') else '0'} but this process preprocesses with "
+              f"{'1' if AMHARIC_CLITIC_STRIPPING else '0'}; its features will not match. Retrain or change the setting.", file=sys.stderr)
+    print(f"Inference backend '{backend.name}' (model version '{version}') loaded successfully.", file=sys.stderr)
+    return backend
+
+
+# Example usage (benchmarks chunked against single-shot inference on synthetic sentences built from the vocabulary)
+if __name__ == "__main__":
+    import time
+    import tracemalloc
+
+    backend = SklearnBackend.from_paths()
+    vocabulary = sorted(backend.vectorizer.vocabulary_) if hasattr(backend.vectorizer, 'vocabulary_') else ['ሰላም', 'ጥሩ', 'ቀን']
+    rng = np.random.RandomState(0)
+    sentences = [" ".join(rng.choice(vocabulary, size=8)) for _ in range(100000)]
+
+    def run(label, predict):
+        tracemalloc.start()
+        start = time.perf_counter()
+        result = predict()
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"{label:<12} {len(sentences) / elapsed:10.0f} sentences/sec, peak {peak / 1e6:8.1f} MB")
+        return result
+
+    single_shot = run("single-shot", lambda: backend.model.predict(backend.vectorizer.transform(sentences)))
+    chunked = run("chunked", lambda: backend.predict(sentences))
+    print(f"Identical predictions: {bool(np.array_equal(single_shot, chunked))}")
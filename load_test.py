@@ -0,0 +1,118 @@
+import argparse
+import json
+import os
+import sys
+import time
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Drive /analyze at high concurrency against synthetic Telegram channels (fake_telegram.py), with no network or credentials.")
+    parser.add_argument('--requests', type=int, default=200, help="Total /analyze requests.")
+    parser.add_argument('--concurrency', type=int, default=16, help="Requests in flight at once.")
+    parser.add_argument('--channels', type=int, default=8, help="Distinct synthetic channels the requests are spread over.")
+    parser.add_argument('--message-limit', type=int, default=100, help="Message limit of every analysis.")
+    parser.add_argument('--latency-ms', type=float, default=50, help="Simulated latency of every Telegram API request.")
+    parser.add_argument('--flood-wait-rate', type=float, default=0.0, help="Share of history/comment requests failing with FloodWaitError.")
+    parser.add_argument('--flood-wait-seconds', type=int, default=0, help="Wait demanded by each injected FloodWaitError.")
+    parser.add_argument('--messages', type=int, default=2000, help="Messages per synthetic channel.")
+    parser.add_argument('--seed', type=int, default=0, help="Seed of the synthetic channels and injected errors.")
+    parser.add_argument('--url', help="Base URL of a running server (started with TELEGRAM_CLIENT_BACKEND=fake) instead of an in-process app.")
+    parser.add_argument('--report', help="Also write the report as JSON to this path.")
+    return parser.parse_args()
+
+
+def configure_fake_backend(args):
+    """Points the app at the fake Telegram backend; must run before config.py is imported."""
+    os.environ.update({
+        'TELEGRAM_CLIENT_BACKEND': 'fake',
+        'FAKE_TELEGRAM_LATENCY_MS': str(args.latency_ms),
+        'FAKE_TELEGRAM_FLOOD_WAIT_RATE': str(args.flood_wait_rate),
+        'FAKE_TELEGRAM_FLOOD_WAIT_SECONDS': str(args.flood_wait_seconds),
+        'FAKE_TELEGRAM_MESSAGES': str(args.messages),
+        'FAKE_TELEGRAM_SEED': str(args.seed),
+        # Every request must scrape and classify; nothing may be answered from the stores.
+        'RESULT_CACHE_ENABLED': '0',
+        'TREND_STORE_ENABLED': '0',
+        'MODEL_RELOAD_POLL_SECONDS': '0',
+        'SHADOW_MODEL_VERSION': '',
+    })
+
+
+def make_in_process_poster():
+    """Returns post(form) -> (status, body) against the app module's Flask app, served in this process."""
+    from app import app
+    client = app.test_client()
+
+    def post(form):
+        response = client.post('/analyze', data=form)
+        return response.status_code, response.get_data(as_text=True)
+
+    return post
+
+
+def make_http_poster(base_url):
+    def post(form):
+        request = urllib.request.Request(base_url.rstrip('/') + '/analyze', data=urllib.parse.urlencode(form).encode())
+        with urllib.request.urlopen(request, timeout=600) as response:
+            return response.status, response.read().decode('utf-8')
+
+    return post
+
+
+def run_load(post, n_requests, concurrency, n_channels, message_limit):
+    """
+    Sends n_requests /analyze requests, concurrency at a time, spread round-robin over n_channels channels.
+    Returns the report dict: throughput, latency percentiles, failures and the CPU use of this process.
+    """
+    forms = [{'url': f"https://t.me/loadtest_{i % n_channels}", 'message_limit': str(message_limit)} for i in range(n_requests)]
+
+    def send(form):
+        start = time.perf_counter()
+        try:
+            status, body = post(form)
+            # results.html renders analysis errors with HTTP 200, so look for its error box too.
+            ok = status == 200 and 'class="error-message"' not in body
+        except Exception as e:
+            print(f"Request for {form['url']} failed: {e}", file=sys.stderr)
+            ok = False
+        return time.perf_counter() - start, ok
+
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(send, forms))
+    wall_seconds, cpu_seconds = time.perf_counter() - wall_start, time.process_time() - cpu_start
+
+    latencies = np.array([latency for latency, _ in results])
+    return {
+        'requests': n_requests,
+        'concurrency': concurrency,
+        'failed': sum(1 for _, ok in results if not ok),
+        'wall_seconds': round(wall_seconds, 3),
+        'requests_per_sec': round(n_requests / wall_seconds, 2),
+        'latency_ms': {f"p{q}": round(float(np.percentile(latencies, q)) * 1000, 1) for q in (50, 95, 99)},
+        # Share of the machine's CPUs this process kept busy; near 1.0 means the workers are saturated.
+        'cpu_utilisation': round(cpu_seconds / wall_seconds / (os.cpu_count() or 1), 3),
+    }
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.url:
+        post = make_http_poster(args.url)
+    else:
+        configure_fake_backend(args)
+        post = make_in_process_poster()
+
+    report = run_load(post, args.requests, args.concurrency, args.channels, args.message_limit)
+    if not args.url:
+        from fake_telegram import FakeTelegramClient
+        report['telegram'] = FakeTelegramClient.stats()
+        report['telegram']['messages_per_sec'] = round(report['requests'] * args.message_limit / report['wall_seconds'], 1)
+    print(json.dumps(report, indent=2))
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
@@ -0,0 +1,144 @@
+import argparse
+import json
+import os
+import shutil
+import sys
+import time
+import joblib
+
+from config import VECTORIZER_PATH, MODEL_PATH, MODEL_DIR, MODEL_VERSIONS_DIR, MODEL_MANIFEST_PATH
+
+VECTORIZER_FILENAME = os.path.basename(VECTORIZER_PATH)
+MODEL_FILENAME = os.path.basename(MODEL_PATH)
+# Pruned/quantized export of a version's model (model_trainer.py --export-compact), kept next to it.
+COMPACT_MODEL_FILENAME = 'compact_linear_model.pkl'
+# Version reported for the artifacts at VECTORIZER_PATH / MODEL_PATH when there is no manifest yet.
+UNVERSIONED = 'unversioned'
+
+
+def read_manifest(manifest_path=MODEL_MANIFEST_PATH):
+    """Returns the manifest dict {'active': version, 'versions': {version: info}}, or None if there is none."""
+    try:
+        with open(manifest_path, encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def write_manifest(manifest, manifest_path=MODEL_MANIFEST_PATH):
+    """Replaces the manifest atomically, so readers see either the old or the new file, never a partial one."""
+    tmp_path = f"{manifest_path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2, default=str)
+    os.replace(tmp_path, manifest_path)
+
+
+def manifest_mtime(manifest_path=MODEL_MANIFEST_PATH):
+    """Modification time of the manifest (None if missing); cheap enough to poll."""
+    try:
+        return os.stat(manifest_path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def resolve_model_paths(version=None, manifest_path=MODEL_MANIFEST_PATH):
+    """
+    Returns (version, vectorizer path, model path) for the given version, or the active one by default.
+    Falls back to the unversioned VECTORIZER_PATH / MODEL_PATH when no manifest exists.
+    """
+    manifest = read_manifest(manifest_path)
+    if manifest is None:
+        if version not in (None, UNVERSIONED):
+            raise ValueError(f"Unknown model version '{version}': no manifest at '{manifest_path}'.")
+        return UNVERSIONED, VECTORIZER_PATH, MODEL_PATH
+    version = version or manifest['active']
+    info = manifest['versions'].get(version)
+    if info is None:
+        raise ValueError(f"Unknown model version '{version}'. Available: {', '.join(sorted(manifest['versions']))}")
+    base_dir = os.path.dirname(manifest_path)
+    return version, os.path.join(base_dir, info['vectorizer']), os.path.join(base_dir, info['model'])
+
+
+def compact_model_path(model_path):
+    """Path of the compact export derived from the model at model_path."""
+    return os.path.join(os.path.dirname(model_path), COMPACT_MODEL_FILENAME)
+
+
+def update_version_metadata(version, metadata, manifest_path=MODEL_MANIFEST_PATH):
+    """Merges metadata into a published version's manifest entry; no-op for the unversioned artifacts."""
+    manifest = read_manifest(manifest_path)
+    if manifest is None or version not in manifest['versions']:
+        return
+    manifest['versions'][version].update(metadata)
+    write_manifest(manifest, manifest_path)
+
+
+def publish_model_version(vectorizer, model, version=None, activate=True, metadata=None,
+                          versions_dir=MODEL_VERSIONS_DIR, manifest_path=MODEL_MANIFEST_PATH):
+    """
+    Saves a vectorizer/model pair as a new immutable version and records it in the manifest.
+    The artifacts are written to a temporary directory that is renamed into place before the manifest
+    is updated, so a watcher never sees a version whose files are still being written.
+    Returns the version string.
+    """
+    version = version or time.strftime('%Y%m%d-%H%M%S')
+    os.makedirs(versions_dir, exist_ok=True)
+    version_dir = os.path.join(versions_dir, version)
+    if os.path.exists(version_dir):
+        raise ValueError(f"Model version '{version}' already exists in '{versions_dir}'.")
+
+    tmp_dir = os.path.join(versions_dir, f".{version}.tmp")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    joblib.dump(vectorizer, os.path.join(tmp_dir, VECTORIZER_FILENAME))
+    joblib.dump(model, os.path.join(tmp_dir, MODEL_FILENAME))
+    os.rename(tmp_dir, version_dir)
+
+    base_dir = os.path.dirname(manifest_path)
+    manifest = read_manifest(manifest_path) or {'active': None, 'versions': {}}
+    manifest['versions'][version] = {
+        'vectorizer': os.path.relpath(os.path.join(version_dir, VECTORIZER_FILENAME), base_dir),
+        'model': os.path.relpath(os.path.join(version_dir, MODEL_FILENAME), base_dir),
+        'created_at': time.time(),
+        **(metadata or {}),
+    }
+    if activate or manifest['active'] is None:
+        manifest['active'] = version
+    write_manifest(manifest, manifest_path)
+    return version
+
+
+def activate_model_version(version, manifest_path=MODEL_MANIFEST_PATH):
+    """Marks an already published version as active (used for promotion and rollback)."""
+    manifest = read_manifest(manifest_path)
+    if manifest is None or version not in manifest['versions']:
+        raise ValueError(f"Unknown model version '{version}'.")
+    manifest['active'] = version
+    write_manifest(manifest, manifest_path)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=f"List or activate the model versions published in {MODEL_DIR}/.")
+    parser.add_argument('--activate', metavar='VERSION', help="Make VERSION the served model; running workers pick it up on their next manifest check.")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    try:
+        if args.activate:
+            activate_model_version(args.activate)
+            print(f"Model version '{args.activate}' is now active.")
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    manifest = read_manifest()
+    if manifest is None:
+        print(f"No manifest at '{MODEL_MANIFEST_PATH}'; serving the unversioned artifacts in {MODEL_DIR}/.")
+        sys.exit(0)
+    for version, info in sorted(manifest['versions'].items()):
+        marker = '*' if version == manifest['active'] else ' '
+        created = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(info.get('created_at', 0)))
+        accuracy = f"accuracy {info['accuracy']:.4f}" if 'accuracy' in info else ''
+        print(f"{marker} {version:<20} {created}  {accuracy}")
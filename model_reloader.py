@@ -0,0 +1,123 @@
+import sys
+import threading
+import time
+import numpy as np
+
+from config import INFERENCE_BACKEND, LABEL_MAPPING, MODEL_RELOAD_POLL_SECONDS
+from amharic_preprocessing import preprocess_amharic_text
+from inference import load_inference_backend
+from model_registry import read_manifest, manifest_mtime
+
+# Every candidate model must classify these before it is swapped in.
+SMOKE_TEST_SENTENCES = [
+    "ይህ የሙከራ መልእክት ነው።",
+    "ሰላም ለሁላችሁም እንዴት ናችሁ?",
+    "መንግስት አዲስ ፖሊሲ አውጥቷል።",
+    "ይህ ሰው በጣም መጥፎ ነው።",
+    "ዛሬ ጥሩ ቀን ነው።",
+    "ስለ ሀገራችን ሰላም እንጸልይ።",
+]
+
+
+def smoke_test_backend(backend, sentences=SMOKE_TEST_SENTENCES):
+    """
+    Classifies a small fixed batch and checks the output is sane: one known label per sentence and
+    probability rows that sum to one. Raises ValueError on failure; returns the batch latency in seconds.
+    """
+    processed_sentences = [preprocess_amharic_text(s) for s in sentences]
+    start = time.perf_counter()
+    label_ids, probabilities = backend.predict_with_proba(processed_sentences)
+    elapsed = time.perf_counter() - start
+
+    if set(int(c) for c in backend.classes) != set(LABEL_MAPPING):
+        raise ValueError(f"model classes {list(backend.classes)} do not match LABEL_MAPPING {sorted(LABEL_MAPPING)}")
+    if len(label_ids) != len(processed_sentences):
+        raise ValueError(f"expected {len(processed_sentences)} predictions on the smoke batch, got {len(label_ids)}")
+    if not np.all(np.isfinite(probabilities)) or not np.allclose(probabilities.sum(axis=1), 1.0, atol=1e-3):
+        raise ValueError("class probabilities on the smoke batch are not a valid distribution")
+    return elapsed
+
+
+class ModelReloader:
+    """
+    Hot-swaps the model of an AnalysisService without restarting the worker.
+    A new version is loaded and smoke-tested while the current one keeps serving, then swapped in with
+    a single reference assignment; analyses already running hold on to the backend they started with.
+    reload() does this on demand (admin endpoint); start_watching() polls the manifest so every worker
+    follows `python model_registry.py --activate VERSION`. A failed load or smoke test keeps the old model.
+    """
+
+    def __init__(self, service, backend_name=INFERENCE_BACKEND, poll_seconds=MODEL_RELOAD_POLL_SECONDS):
+        self.service = service
+        self.backend_name = backend_name
+        self.poll_seconds = poll_seconds
+        self.last_reload = None
+        self.last_error = None
+        self._reload_lock = threading.Lock()
+        self._watched_mtime = manifest_mtime()
+        self._watcher = None
+
+    def reload(self, version=None):
+        """
+        Loads the given version (the manifest's active one by default), validates it and swaps it in.
+        Returns a dict describing the swap; raises if the new model could not be loaded or validated.
+        """
+        with self._reload_lock:
+            previous_version = self.service.backend.version
+            start = time.perf_counter()
+            try:
+                backend = load_inference_backend(self.backend_name, version)
+                smoke_seconds = smoke_test_backend(backend)
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+                raise
+            self.service.swap_backend(backend)
+            self.last_error = None
+            self.last_reload = {
+                'previous_version': previous_version,
+                'version': backend.version,
+                'load_seconds': round(time.perf_counter() - start, 3),
+                'smoke_test_ms': round(smoke_seconds * 1000, 2),
+                'reloaded_at': time.time(),
+            }
+            print(f"Model version '{backend.version}' swapped in (was '{previous_version}').", file=sys.stderr)
+            return self.last_reload
+
+    def check_manifest(self):
+        """Reloads if the manifest changed since the last check and now names a different active version."""
+        mtime = manifest_mtime()
+        if mtime == self._watched_mtime:
+            return None
+        self._watched_mtime = mtime
+        manifest = read_manifest()
+        if manifest is None or manifest['active'] == self.service.backend.version:
+            return None
+        return self.reload(manifest['active'])
+
+    def start_watching(self):
+        """Starts the manifest polling thread (a daemon, one per worker process)."""
+        if self._watcher is not None or self.poll_seconds <= 0:
+            return
+
+        def watch():
+            while True:
+                time.sleep(self.poll_seconds)
+                try:
+                    self.check_manifest()
+                except Exception as e:
+                    print(f"Warning: model reload failed, keeping version '{self.service.backend.version}': {e}", file=sys.stderr)
+
+        self._watcher = threading.Thread(target=watch, name='model-reloader', daemon=True)
+        self._watcher.start()
+
+    def status(self):
+        manifest = read_manifest()
+        return {
+            'version': self.service.backend.version,
+            'backend': self.service.backend.name,
+            'active_version': manifest['active'] if manifest else None,
+            'available_versions': sorted(manifest['versions']) if manifest else [],
+            'last_reload': self.last_reload,
+            'last_error': self.last_error,
+            'watching': self._watcher is not None,
+        }
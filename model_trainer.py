@@ -1,22 +1,99 @@
 import os
+import io
+import json
+import time
+import argparse
 import joblib
+from joblib import Parallel, delayed
 from datasets import load_dataset
-from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.feature_extraction.text import TfidfVectorizer, HashingVectorizer, TfidfTransformer
+from sklearn.pipeline import make_pipeline
 from sklearn.linear_model import LogisticRegression
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import classification_report, confusion_matrix, accuracy_score
+from sklearn.model_selection import train_test_split, StratifiedKFold, ParameterGrid
+from sklearn.metrics import classification_report, confusion_matrix, accuracy_score, f1_score
 from tqdm import tqdm
 import pandas as pd
 import sys
 import numpy as np
+import scipy.sparse as sp
 
 # --- ADD THIS IMPORT LINE ---
 from amharic_preprocessing import preprocess_amharic_text
 # --- END ADDITION ---
 
-from config import VECTORIZER_PATH, MODEL_PATH, MODEL_DIR, LABEL_MAPPING
+from config import MODEL_DIR, LABEL_MAPPING, AMHARIC_CLITIC_STRIPPING
+from model_registry import publish_model_version, resolve_model_paths, compact_model_path, update_version_metadata
+from inference import SklearnBackend, CompactLinearBackend
 
-def train_and_save_model():
+# --- Default (serving) configuration ---
+DEFAULT_VECTORIZER_PARAMS = {'max_features': 10000, 'min_df': 5, 'max_df': 0.8}
+DEFAULT_MODEL_PARAMS = {'max_iter': 2000, 'random_state': 42, 'solver': 'liblinear', 'class_weight': 'balanced'}
+
+# --- Feature modes ---
+# 'word' is the original word-level TF-IDF. The character modes use char_wb n-grams (n-grams inside word
+# boundaries), which catch the prefixed/suffixed forms of agglutinative Amharic words that a word vocabulary
+# treats as unrelated tokens. Both bound the feature space: 'char' keeps the max_features most frequent
+# n-grams, 'char_hashed' hashes into n_features columns and never builds a vocabulary, which keeps fitting
+# and transforming cheap for the much larger n-gram counts. float32 halves the size of the sparse matrices.
+FEATURE_MODE_PARAMS = {
+    'word': DEFAULT_VECTORIZER_PARAMS,
+    'char': {'analyzer': 'char_wb', 'ngram_range': (2, 4), 'max_features': 50000, 'min_df': 5, 'max_df': 0.8,
+             'sublinear_tf': True, 'dtype': np.float32},
+    'char_hashed': {'analyzer': 'char_wb', 'ngram_range': (2, 4), 'n_features': 2 ** 18, 'sublinear_tf': True},
+}
+
+# --- Hyperparameter search space ---
+# Each vectorizer setting is fitted once per cross-validation fold (and once on the full training split),
+# and those TF-IDF matrices are reused for every model setting.
+SEARCH_VECTORIZER_GRID = [
+    {'feature_mode': 'word', 'ngram_range': (1, 1)},
+    {'feature_mode': 'word', 'ngram_range': (1, 2)},
+    {'feature_mode': 'word', 'ngram_range': (1, 3), 'max_features': 20000},
+    {'feature_mode': 'char'},
+    {'feature_mode': 'char_hashed'},
+]
+SEARCH_MODEL_GRID = {
+    'C': [0.1, 0.3, 1.0, 3.0, 10.0],
+    'class_weight': [None, 'balanced'],
+}
+
+# --- Compact export (--export-compact) ---
+# Weights smaller than a threshold fraction of the largest absolute weight are pruned and vocabulary entries
+# left without any weight are dropped. Unless a threshold is given, the most aggressive of these candidates
+# whose test accuracy stays within the tolerance of the original model is used; otherwise nothing is saved.
+COMPACT_THRESHOLD_CANDIDATES = (0.2, 0.1, 0.05, 0.02, 0.01, 0.005, 0.0)
+COMPACT_WEIGHT_DTYPES = ('int8', 'float32')
+COMPACT_ACCURACY_TOLERANCE = 0.005
+
+
+def build_vectorizer(feature_mode='word', **overrides):
+    """Creates an unfitted vectorizer for one of FEATURE_MODE_PARAMS, with keyword overrides applied."""
+    if feature_mode not in FEATURE_MODE_PARAMS:
+        raise ValueError(f"Unknown feature mode '{feature_mode}'. Available: {', '.join(FEATURE_MODE_PARAMS)}")
+    params = {**FEATURE_MODE_PARAMS[feature_mode], **overrides}
+    if feature_mode == 'char_hashed':
+        sublinear_tf = params.pop('sublinear_tf', True)
+        # norm=None: the TfidfTransformer applies idf weighting and the l2 normalisation afterwards.
+        return make_pipeline(
+            HashingVectorizer(alternate_sign=False, norm=None, dtype=np.float32, **params),
+            TfidfTransformer(sublinear_tf=sublinear_tf),
+        )
+    return TfidfVectorizer(**params)
+
+
+def feature_count(vectorizer):
+    """Number of feature columns produced by a fitted vectorizer from build_vectorizer."""
+    if hasattr(vectorizer, 'vocabulary_'):
+        return len(vectorizer.vocabulary_)
+    return vectorizer[0].n_features
+
+
+def load_training_data():
+    """
+    Loads the dataset, preprocesses it and returns the train/test split.
+    Returns:
+        tuple: (X_train, X_test, y_train, y_test) with preprocessed texts and numeric labels.
+    """
     print("--- Loading Amharic Hate Speech Dataset ---")
     try:
         dataset = load_dataset("uhhlt/amharichatespeechranlp", split='train')
@@ -105,22 +182,37 @@ def train_and_save_model():
 
     print(f"\nTraining samples: {len(X_train)}")
     print(f"Testing samples: {len(X_test)}")
+    return X_train, X_test, y_train, y_test
+
+
+def train_and_save_model(vectorizer_params=None, model_params=None, activate=True):
+    """
+    Trains the serving vectorizer and model, evaluates them and publishes them as a new model version
+    (see model_registry.py). With activate=False the version is only recorded, e.g. to be validated first.
+    vectorizer_params are passed to build_vectorizer (may include 'feature_mode'); model_params override DEFAULT_MODEL_PARAMS.
+    """
+    vectorizer_params = vectorizer_params or {}
+    model_params = {**DEFAULT_MODEL_PARAMS, **(model_params or {})}
+    X_train, X_test, y_train, y_test = load_training_data()
 
     print("\n--- Training TF-IDF Vectorizer ---")
-    tfidf_vectorizer = TfidfVectorizer(max_features=10000, min_df=5, max_df=0.8)
+    print(f"Vectorizer parameters: {vectorizer_params}")
+    tfidf_vectorizer = build_vectorizer(**vectorizer_params)
     X_train_tfidf = tfidf_vectorizer.fit_transform(X_train)
     X_test_tfidf = tfidf_vectorizer.transform(X_test)
 
-    print(f"TF-IDF vectorizer fitted. Vocabulary size: {len(tfidf_vectorizer.vocabulary_)}")
+    print(f"TF-IDF vectorizer fitted. Vocabulary size: {feature_count(tfidf_vectorizer)}")
 
     print("\n--- Training Logistic Regression Model ---")
-    model = LogisticRegression(max_iter=2000, random_state=42, solver='liblinear', class_weight='balanced')
+    print(f"Model parameters: {model_params}")
+    model = LogisticRegression(**model_params)
     model.fit(X_train_tfidf, y_train)
 
     print("\n--- Evaluating Model Performance ---")
     y_pred = model.predict(X_test_tfidf) # This should now predict integers!
 
-    print(f"Accuracy: {accuracy_score(y_test, y_pred):.4f}")
+    accuracy = accuracy_score(y_test, y_pred)
+    print(f"Accuracy: {accuracy:.4f}")
     print("\nClassification Report:")
     print(classification_report(y_test, y_pred, target_names=[LABEL_MAPPING[i] for i in sorted(LABEL_MAPPING.keys())]))
 
@@ -130,12 +222,352 @@ def train_and_save_model():
     print("\n--- Saving Model and Vectorizer ---")
     os.makedirs(MODEL_DIR, exist_ok=True)
     try:
-        joblib.dump(tfidf_vectorizer, VECTORIZER_PATH)
-        joblib.dump(model, MODEL_PATH)
-        print(f"Model and vectorizer saved to {MODEL_DIR}/")
+        version = publish_model_version(tfidf_vectorizer, model, activate=activate, metadata={
+            'accuracy': accuracy,
+            'macro_f1': f1_score(y_test, y_pred, average='macro'),
+            'vectorizer_params': {k: repr(v) for k, v in vectorizer_params.items()},
+            'model_params': model_params,
+            # Serving must preprocess the same way; load_inference_backend warns on a mismatch.
+            'clitic_stripping': AMHARIC_CLITIC_STRIPPING,
+        })
+        print(f"Model and vectorizer saved to {MODEL_DIR}/ as version '{version}'" + (" (active)" if activate else ""))
     except Exception as e:
         print(f"Error saving model or vectorizer: {e}", file=sys.stderr)
         sys.exit(1)
 
+
+def measure_inference(vectorizer, model, texts, repeats=3):
+    """Returns (sentences/sec, serialized vectorizer+model size in bytes) for the serving path on `texts`."""
+    best_seconds = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        model.predict(vectorizer.transform(texts))
+        best_seconds = min(best_seconds, time.perf_counter() - start)
+    buffer = io.BytesIO()
+    joblib.dump((vectorizer, model), buffer)
+    return len(texts) / best_seconds if best_seconds > 0 else float('inf'), buffer.tell()
+
+
+def mark_pareto_front(results):
+    """
+    Flags each result with 'pareto': True when no other configuration is at least as good on
+    cross-validated macro-F1, throughput and size while being strictly better on one of them. The test
+    split is kept out of model selection, so test scores never decide the front.
+    """
+    def dominates(a, b):
+        at_least_as_good = (a['cv_macro_f1'] >= b['cv_macro_f1'] and a['sentences_per_sec'] >= b['sentences_per_sec']
+                            and a['model_size_bytes'] <= b['model_size_bytes'])
+        strictly_better = (a['cv_macro_f1'] > b['cv_macro_f1'] or a['sentences_per_sec'] > b['sentences_per_sec']
+                           or a['model_size_bytes'] < b['model_size_bytes'])
+        return at_least_as_good and strictly_better
+
+    for result in results:
+        result['pareto'] = not any(dominates(other, result) for other in results if other is not result)
+    return results
+
+
+def _fit_fold_features(vectorizer_params, X_train, y_train, cv):
+    """
+    Fits a fresh vectorizer on the training part of every fold, so the vocabulary, min_df/max_df and idf
+    never see the fold it is validated on. Returns [(X_fit, y_fit, X_val, y_val)] per fold.
+    """
+    X_train, y_train = np.asarray(X_train, dtype=object), np.asarray(y_train)
+    folds = []
+    for fit_index, val_index in cv.split(X_train, y_train):
+        vectorizer = build_vectorizer(**vectorizer_params)
+        folds.append((vectorizer.fit_transform(X_train[fit_index]), y_train[fit_index],
+                      vectorizer.transform(X_train[val_index]), y_train[val_index]))
+    return folds
+
+
+def _score_fold(model_params, X_fit, y_fit, X_val, y_val):
+    y_pred = LogisticRegression(**model_params).fit(X_fit, y_fit).predict(X_val)
+    return accuracy_score(y_val, y_pred), f1_score(y_val, y_pred, average='macro')
+
+
+def hyperparameter_search(X_train, X_test, y_train, y_test, vectorizer_grid=None, model_grid=None, cv_folds=5, n_jobs=-1):
+    """
+    Evaluates every (vectorizer setting, LogisticRegression setting) combination.
+    The texts are preprocessed once (load_training_data). For each vectorizer setting a vectorizer is
+    fitted per cross-validation fold, on that fold's training part only, and the fold matrices are cached
+    and reused for all model settings; folds are scored in parallel on n_jobs cores. Every configuration
+    is then refitted on the full training split and scored on the held-out test split for accuracy,
+    macro-F1, throughput and size. Ranking and the Pareto front use the cross-validated macro-F1; the
+    test_* columns are reported only.
+    Returns:
+        list of dicts, one per configuration, sorted by CV macro-F1 and flagged with 'pareto'.
+    """
+    vectorizer_grid = vectorizer_grid or SEARCH_VECTORIZER_GRID
+    model_grid = list(ParameterGrid(model_grid or SEARCH_MODEL_GRID))
+    cv = StratifiedKFold(n_splits=cv_folds, shuffle=True, random_state=42)
+    results = []
+
+    for vectorizer_params in vectorizer_grid:
+        print(f"\n--- Fitting TF-IDF Vectorizer: {vectorizer_params} ---")
+        folds = _fit_fold_features(vectorizer_params, X_train, y_train, cv)
+        vectorizer = build_vectorizer(**vectorizer_params)
+        X_train_tfidf = vectorizer.fit_transform(X_train)
+        X_test_tfidf = vectorizer.transform(X_test)
+        print(f"Vocabulary size: {feature_count(vectorizer)}")
+
+        for model_overrides in tqdm(model_grid, desc="Model settings"):
+            model_params = {**DEFAULT_MODEL_PARAMS, **model_overrides}
+            fold_scores = np.array(Parallel(n_jobs=n_jobs)(delayed(_score_fold)(model_params, *fold) for fold in folds))
+
+            model = LogisticRegression(**model_params).fit(X_train_tfidf, y_train)
+            y_pred = model.predict(X_test_tfidf)
+            sentences_per_sec, model_size_bytes = measure_inference(vectorizer, model, X_test)
+
+            results.append({
+                'vectorizer_params': vectorizer_params,
+                'model_params': model_overrides,
+                'vocabulary_size': feature_count(vectorizer),
+                'cv_accuracy': float(fold_scores[:, 0].mean()),
+                'cv_macro_f1': float(fold_scores[:, 1].mean()),
+                'test_accuracy': accuracy_score(y_test, y_pred),
+                'test_macro_f1': f1_score(y_test, y_pred, average='macro'),
+                'sentences_per_sec': sentences_per_sec,
+                'model_size_bytes': model_size_bytes,
+            })
+
+    mark_pareto_front(results)
+    results.sort(key=lambda r: r['cv_macro_f1'], reverse=True)
+    return results
+
+
+def print_search_report(results):
+    print("\n--- Hyperparameter Search Results (sorted by CV macro-F1, * = Pareto-optimal) ---")
+    print(f"{'':2}{'cv_acc':>7} {'cv_f1':>7} {'test_acc':>8} {'test_f1':>8} {'sent/s':>10} {'size_kb':>8}  configuration")
+    for r in results:
+        config_str = json.dumps({'vectorizer': r['vectorizer_params'], 'model': r['model_params']}, default=str)
+        print(f"{'*' if r['pareto'] else ' ':2}{r['cv_accuracy']:7.4f} {r['cv_macro_f1']:7.4f} {r['test_accuracy']:8.4f} "
+              f"{r['test_macro_f1']:8.4f} {r['sentences_per_sec']:10.0f} {r['model_size_bytes'] / 1024:8.0f}  {config_str}")
+    print("\nTrain a configuration for serving with:")
+    print("  python model_trainer.py --vectorizer-params '<vectorizer json>' --model-params '<model json>'")
+
+
+def benchmark_feature_modes(X_train, X_test, y_train, y_test, feature_modes=None, model_params=None):
+    """
+    Trains one model per feature mode on the same split and compares held-out macro-F1 against
+    serving throughput, feature count and artifact size, relative to the 'word' baseline.
+    """
+    feature_modes = feature_modes or list(FEATURE_MODE_PARAMS)
+    model_params = {**DEFAULT_MODEL_PARAMS, **(model_params or {})}
+    results = []
+    for feature_mode in feature_modes:
+        print(f"\n--- Benchmarking feature mode '{feature_mode}' ---")
+        vectorizer = build_vectorizer(feature_mode)
+        start = time.perf_counter()
+        X_train_features = vectorizer.fit_transform(X_train)
+        fit_seconds = time.perf_counter() - start
+        model = LogisticRegression(**model_params).fit(X_train_features, y_train)
+        y_pred = model.predict(vectorizer.transform(X_test))
+        sentences_per_sec, model_size_bytes = measure_inference(vectorizer, model, X_test)
+        results.append({
+            'feature_mode': feature_mode,
+            'features': feature_count(vectorizer),
+            'train_nnz_per_sentence': X_train_features.nnz / max(X_train_features.shape[0], 1),
+            'vectorizer_fit_seconds': fit_seconds,
+            'test_macro_f1': f1_score(y_test, y_pred, average='macro'),
+            'sentences_per_sec': sentences_per_sec,
+            'model_size_bytes': model_size_bytes,
+        })
+
+    baseline = next((r for r in results if r['feature_mode'] == 'word'), results[0])
+    print("\n--- Feature Mode Benchmark ---")
+    print(f"{'mode':<12} {'features':>9} {'nnz/sent':>9} {'fit_s':>7} {'macro_f1':>9} {'d_f1':>7} {'sent/s':>10} {'speed':>6} {'size_kb':>8}")
+    for r in results:
+        print(f"{r['feature_mode']:<12} {r['features']:9d} {r['train_nnz_per_sentence']:9.1f} {r['vectorizer_fit_seconds']:7.2f} "
+              f"{r['test_macro_f1']:9.4f} {r['test_macro_f1'] - baseline['test_macro_f1']:+7.4f} {r['sentences_per_sec']:10.0f} "
+              f"{r['sentences_per_sec'] / baseline['sentences_per_sec']:5.2f}x {r['model_size_bytes'] / 1024:8.0f}")
+    return results
+
+
+def _prune_vocabulary(vectorizer, kept_features):
+    """TfidfVectorizer with the settings and idf weights of a fitted one, producing only the kept_features columns."""
+    new_index = np.full(len(vectorizer.vocabulary_), -1, dtype=np.int64)
+    new_index[kept_features] = np.arange(len(kept_features))
+    vocabulary = {term: int(new_index[i]) for term, i in vectorizer.vocabulary_.items() if new_index[i] >= 0}
+    pruned = TfidfVectorizer(**{**vectorizer.get_params(), 'vocabulary': vocabulary, 'dtype': np.float32})
+    pruned.idf_ = vectorizer.idf_[kept_features]
+    return pruned
+
+
+def build_compact_model(vectorizer, model, weight_threshold, weight_dtype='int8'):
+    """
+    Prunes and quantizes a fitted linear model into the dict served by inference.CompactLinearBackend.
+    int8 weights use one symmetric scale per class (largest absolute weight / 127).
+    Hashed vectorizers have no vocabulary to drop (nor do ones without idf weights), so only their weights are pruned.
+    Note that the l2 normalisation of the pruned vectorizer only sees the kept vocabulary, which is one
+    reason the export is checked against the original model before it is saved.
+    """
+    if weight_dtype not in COMPACT_WEIGHT_DTYPES:
+        raise ValueError(f"Unknown weight dtype '{weight_dtype}'. Available: {', '.join(COMPACT_WEIGHT_DTYPES)}")
+    coef = np.asarray(model.coef_)
+    kept_weights = np.abs(coef) >= weight_threshold * np.abs(coef).max()
+    if hasattr(vectorizer, 'vocabulary_') and vectorizer.use_idf:
+        kept_features = np.flatnonzero(kept_weights.any(axis=0))
+        compact_vectorizer = _prune_vocabulary(vectorizer, kept_features)
+    else:
+        kept_features = np.arange(coef.shape[1])
+        compact_vectorizer = vectorizer
+    weights = np.where(kept_weights, coef, 0.0)[:, kept_features].T
+
+    if weight_dtype == 'int8':
+        scales = np.abs(weights).max(axis=0) / 127.0
+        scales[scales == 0] = 1.0
+        stored_weights = np.round(weights / scales).astype(np.int8)
+    else:
+        scales = np.ones(weights.shape[1])
+        stored_weights = weights.astype(np.float32)
+    return {
+        'vectorizer': compact_vectorizer,
+        'weights': sp.csr_matrix(stored_weights),
+        'scales': scales.astype(np.float32),
+        'intercept': np.asarray(model.intercept_, dtype=np.float32),
+        'classes': model.classes_,
+        'weight_threshold': weight_threshold,
+        'weight_dtype': weight_dtype,
+        'features_kept': int(len(kept_features)),
+        'features_total': int(coef.shape[1]),
+        'weights_kept': int(kept_weights.sum()),
+        'weights_total': int(kept_weights.size),
+    }
+
+
+def _serving_throughput(backend, texts, repeats=3):
+    best_seconds = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        backend.predict(texts)
+        best_seconds = min(best_seconds, time.perf_counter() - start)
+    return len(texts) / best_seconds if best_seconds > 0 else float('inf')
+
+
+def _artifact_size(*artifacts):
+    buffer = io.BytesIO()
+    joblib.dump(artifacts, buffer)
+    return buffer.tell()
+
+
+def evaluate_compact_model(vectorizer, model, compact_model, X_test, y_test, benchmark_sentences=20000):
+    """
+    Compares the compact export with the original model on the test split: accuracy, macro-F1, label
+    agreement, serialized size, and serving throughput of both backends (on the test texts repeated
+    up to benchmark_sentences).
+    """
+    X_test, y_test = list(X_test), np.asarray(y_test)
+    original_backend = SklearnBackend(vectorizer, model)
+    compact_backend = CompactLinearBackend(compact_model)
+    original_pred = original_backend.predict(X_test)
+    compact_pred = compact_backend.predict(X_test)
+    benchmark_texts = (X_test * (benchmark_sentences // max(len(X_test), 1) + 1))[:benchmark_sentences]
+    report = {
+        'weight_threshold': compact_model['weight_threshold'],
+        'weight_dtype': compact_model['weight_dtype'],
+        'features_kept': compact_model['features_kept'],
+        'features_total': compact_model['features_total'],
+        'weights_kept_fraction': compact_model['weights_kept'] / compact_model['weights_total'],
+        'accuracy_original': float(accuracy_score(y_test, original_pred)),
+        'accuracy_compact': float(accuracy_score(y_test, compact_pred)),
+        'macro_f1_original': float(f1_score(y_test, original_pred, average='macro')),
+        'macro_f1_compact': float(f1_score(y_test, compact_pred, average='macro')),
+        'label_agreement': float(np.mean(original_pred == compact_pred)),
+        'size_bytes_original': _artifact_size(vectorizer, model),
+        'size_bytes_compact': _artifact_size(compact_model),
+        'sentences_per_sec_original': _serving_throughput(original_backend, benchmark_texts),
+        'sentences_per_sec_compact': _serving_throughput(compact_backend, benchmark_texts),
+    }
+    report['accuracy_delta'] = report['accuracy_compact'] - report['accuracy_original']
+    return report
+
+
+def print_compact_report(report):
+    print("\n--- Compact Model Export ---")
+    print(f"Prune threshold {report['weight_threshold']}, weights: {report['weight_dtype']}, {report['weights_kept_fraction'] * 100:.1f}% kept; "
+          f"vocabulary: {report['features_kept']} of {report['features_total']} features kept")
+    print(f"{'':<10} {'accuracy':>9} {'macro_f1':>9} {'size_kb':>8} {'sent/s':>10}")
+    for variant in ('original', 'compact'):
+        print(f"{variant:<10} {report[f'accuracy_{variant}']:9.4f} {report[f'macro_f1_{variant}']:9.4f} "
+              f"{report[f'size_bytes_{variant}'] / 1024:8.0f} {report[f'sentences_per_sec_{variant}']:10.0f}")
+    print(f"Accuracy delta {report['accuracy_delta']:+.4f}, label agreement {report['label_agreement'] * 100:.2f}%, "
+          f"{report['size_bytes_original'] / report['size_bytes_compact']:.1f}x smaller, "
+          f"{report['sentences_per_sec_compact'] / report['sentences_per_sec_original']:.2f}x throughput")
+
+
+def export_compact_model(version=None, weight_threshold=None, weight_dtype='int8',
+                         accuracy_tolerance=COMPACT_ACCURACY_TOLERANCE):
+    """
+    Builds the compact export of a published model version (the active one by default), evaluates it on the
+    test split and saves it next to the model, where INFERENCE_BACKEND=compact_linear picks it up.
+    weight_threshold=None tries COMPACT_THRESHOLD_CANDIDATES from the most aggressive one down.
+    Exits without saving if accuracy drops by more than accuracy_tolerance.
+    """
+    version, vectorizer_path, model_path = resolve_model_paths(version)
+    vectorizer, model = joblib.load(vectorizer_path), joblib.load(model_path)
+    if not hasattr(model, 'coef_'):
+        print(f"Model version '{version}' is not a linear model; nothing to export.", file=sys.stderr)
+        sys.exit(1)
+    _, X_test, _, y_test = load_training_data()
+
+    thresholds = COMPACT_THRESHOLD_CANDIDATES if weight_threshold is None else (weight_threshold,)
+    for weight_threshold in thresholds:
+        compact_model = build_compact_model(vectorizer, model, weight_threshold, weight_dtype)
+        report = evaluate_compact_model(vectorizer, model, compact_model, X_test, y_test)
+        print(f"Prune threshold {weight_threshold}: accuracy delta {report['accuracy_delta']:+.4f}")
+        if report['accuracy_delta'] >= -accuracy_tolerance:
+            break
+    print_compact_report(report)
+    if report['accuracy_delta'] < -accuracy_tolerance:
+        print(f"Compact export rejected: accuracy dropped by {-report['accuracy_delta']:.4f}, more than the tolerance of "
+              f"{accuracy_tolerance:.4f}. Lower --prune-threshold or use --weight-dtype float32.", file=sys.stderr)
+        sys.exit(1)
+
+    output_path = compact_model_path(model_path)
+    joblib.dump(compact_model, output_path)
+    update_version_metadata(version, {'compact': report})
+    print(f"Compact model for version '{version}' saved to {output_path}. Serve it with INFERENCE_BACKEND=compact_linear.")
+    return report
+
+
+def run_hyperparameter_search(cv_folds=5, n_jobs=-1):
+    X_train, X_test, y_train, y_test = load_training_data()
+    results = hyperparameter_search(X_train, X_test, y_train, y_test, cv_folds=cv_folds, n_jobs=n_jobs)
+    print_search_report(results)
+    return results
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Train the Amharic hate speech model or search its hyperparameters.")
+    parser.add_argument('--search', action='store_true', help="Run the hyperparameter search instead of training the serving model.")
+    parser.add_argument('--benchmark-features', action='store_true', help="Compare macro-F1 and throughput of the feature modes.")
+    parser.add_argument('--feature-mode', choices=sorted(FEATURE_MODE_PARAMS), default=None, help="Feature mode for the trained serving model (default: word).")
+    parser.add_argument('--cv-folds', type=int, default=5, help="Cross-validation folds used by --search.")
+    parser.add_argument('--n-jobs', type=int, default=-1, help="CPU cores used for cross-validation (-1 = all).")
+    parser.add_argument('--vectorizer-params', type=json.loads, default=None, help="JSON overrides for the vectorizer (see build_vectorizer).")
+    parser.add_argument('--model-params', type=json.loads, default=None, help="JSON overrides for LogisticRegression.")
+    parser.add_argument('--no-activate', action='store_true', help="Publish the trained model version without making it the served one.")
+    parser.add_argument('--export-compact', action='store_true', help="Export a pruned/quantized copy of a published model for INFERENCE_BACKEND=compact_linear.")
+    parser.add_argument('--model-version', default=None, help="Model version used by --export-compact (default: the active one).")
+    parser.add_argument('--prune-threshold', type=float, default=None, help="Prune weights below this fraction of the largest weight (default: the largest candidate within the tolerance).")
+    parser.add_argument('--weight-dtype', choices=COMPACT_WEIGHT_DTYPES, default='int8', help="Storage type of the compact weights.")
+    parser.add_argument('--accuracy-tolerance', type=float, default=COMPACT_ACCURACY_TOLERANCE, help="Largest accepted test accuracy drop of the compact export.")
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
-    train_and_save_model()
\ No newline at end of file
+    args = parse_args()
+    if args.search:
+        run_hyperparameter_search(cv_folds=args.cv_folds, n_jobs=args.n_jobs)
+    elif args.export_compact:
+        export_compact_model(args.model_version, args.prune_threshold, args.weight_dtype, args.accuracy_tolerance)
+    elif args.benchmark_features:
+        benchmark_feature_modes(*load_training_data(), model_params=args.model_params)
+    else:
+        vectorizer_params = args.vectorizer_params or {}
+        if 'ngram_range' in vectorizer_params:
+            # JSON has no tuples; TfidfVectorizer requires one.
+            vectorizer_params['ngram_range'] = tuple(vectorizer_params['ngram_range'])
+        if args.feature_mode:
+            vectorizer_params['feature_mode'] = args.feature_mode
+        train_and_save_model(vectorizer_params, args.model_params, activate=not args.no_activate)
\ No newline at end of file
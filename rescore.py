@@ -0,0 +1,180 @@
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import joblib
+import numpy as np
+import pyarrow as pa
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+
+from config import LABEL_MAPPING, ANALYSIS_EXPORT_DIR
+from amharic_preprocessing import preprocess_amharic_text
+from analysis_export import EXPORT_EXTENSIONS, list_analysis_exports
+from inference import SklearnBackend
+
+# Rows of the confusion matrices follow the old label, columns the new label, both in sorted(LABEL_MAPPING) order.
+LABEL_IDS = sorted(LABEL_MAPPING)
+LABEL_POSITIONS = {LABEL_MAPPING[label_id]: position for position, label_id in enumerate(LABEL_IDS)}
+
+# Set in each worker process by _init_worker so the model is unpickled once per process, not per task.
+_worker_backend = None
+_worker_reprocess = False
+
+
+def _init_worker(vectorizer_path, model_path, reprocess):
+    global _worker_backend, _worker_reprocess
+    _worker_backend = SklearnBackend(joblib.load(vectorizer_path), joblib.load(model_path))
+    _worker_reprocess = reprocess
+
+
+def _read_batch(path, batch_index, columns):
+    """Reads one Parquet row group / Arrow record batch of an export file (memory-mapped)."""
+    if path.endswith(EXPORT_EXTENSIONS['arrow']):
+        return ipc.open_file(pa.memory_map(path, 'r')).get_batch(batch_index).select(columns)
+    return pq.ParquetFile(path, memory_map=True).read_row_group(batch_index, columns=columns)
+
+
+def _count_batches(path):
+    if path.endswith(EXPORT_EXTENSIONS['arrow']):
+        return ipc.open_file(pa.memory_map(path, 'r')).num_record_batches
+    return pq.ParquetFile(path, memory_map=True).num_row_groups
+
+
+def _rescore_batch(task):
+    """
+    Worker: re-classifies one batch with the new model.
+    The export's processed_text column is the cached preprocessing; with --reprocess the stored original
+    sentences are preprocessed again instead (e.g. after a preprocessing change).
+    Returns (path, old-label x new-label confusion matrix).
+    """
+    path, batch_index = task
+    batch = _read_batch(path, batch_index, ['sentence', 'processed_text', 'label'])
+    if _worker_reprocess:
+        processed_sentences = [preprocess_amharic_text(s) for s in batch.column('sentence').to_pylist()]
+    else:
+        processed_sentences = batch.column('processed_text').to_pylist()
+    old_positions = np.fromiter((LABEL_POSITIONS[label] for label in batch.column('label').to_pylist()),
+                                dtype=np.int64, count=batch.num_rows)
+
+    confusion = np.zeros((len(LABEL_IDS), len(LABEL_IDS)), dtype=np.int64)
+    new_label_ids = _worker_backend.predict(processed_sentences)
+    if len(new_label_ids) == 0:
+        return path, confusion
+    new_positions = np.searchsorted(LABEL_IDS, new_label_ids)
+    np.add.at(confusion, (old_positions, new_positions), 1)
+    return path, confusion
+
+
+def _distribution(counts):
+    total = counts.sum()
+    return {LABEL_MAPPING[label_id]: (100.0 * counts[i] / total if total else 0.0) for i, label_id in enumerate(LABEL_IDS)}
+
+
+def _read_metadata(path):
+    if path.endswith(EXPORT_EXTENSIONS['parquet']):
+        return json.loads(pq.read_schema(path).metadata[b'analysis'])
+    return json.loads(ipc.open_file(pa.memory_map(path, 'r')).schema.metadata[b'analysis'])
+
+
+def _label_shift(confusion):
+    """Sentence count, changed share, old/new distributions and transitions of one old x new confusion matrix."""
+    old_distribution = _distribution(confusion.sum(axis=1))
+    new_distribution = _distribution(confusion.sum(axis=0))
+    total = int(confusion.sum())
+    return {
+        'sentences': total,
+        'changed_fraction': (total - int(np.trace(confusion))) / total if total else 0.0,
+        'old_distribution_pct': old_distribution,
+        'new_distribution_pct': new_distribution,
+        'shift_pct_points': {label: new_distribution[label] - old_distribution[label] for label in old_distribution},
+        'transitions': {f"{LABEL_MAPPING[LABEL_IDS[i]]}->{LABEL_MAPPING[LABEL_IDS[j]]}": int(confusion[i, j])
+                        for i in range(len(LABEL_IDS)) for j in range(len(LABEL_IDS)) if i != j and confusion[i, j]},
+    }
+
+
+def build_report(confusion_by_path):
+    """
+    Turns per-export confusion matrices into the label-shift report:
+    'channels' has one entry per channel/group (the identifier in the export metadata), adding up every
+    stored analysis of it; 'analyses' has one entry per export file.
+    """
+    analyses = []
+    confusion_by_channel = {}
+    for path, confusion in sorted(confusion_by_path.items()):
+        metadata = _read_metadata(path)
+        channel = metadata.get('identifier') or metadata.get('url')
+        channel_entry = confusion_by_channel.setdefault(channel, {'confusion': np.zeros_like(confusion), 'analyses': 0})
+        channel_entry['confusion'] += confusion
+        channel_entry['analyses'] += 1
+        analyses.append({
+            'export': path,
+            'channel': channel,
+            'url': metadata.get('url'),
+            'analyzed_at': metadata.get('created_at'),
+            **_label_shift(confusion),
+        })
+    channels = [{'channel': channel, 'analyses': entry['analyses'], **_label_shift(entry['confusion'])}
+                for channel, entry in sorted(confusion_by_channel.items(), key=lambda item: str(item[0]))]
+    return {'channels': channels, 'analyses': analyses}
+
+
+def rescore_exports(export_paths, vectorizer_path, model_path, workers=None, reprocess=False):
+    """
+    Re-classifies stored analyses with a new vectorizer/model across a process pool, entirely offline.
+    Every row group / record batch of every export is one task, so memory per worker stays bounded by
+    the export batch size regardless of the total number of sentences.
+    Returns:
+        dict: export path -> old-label x new-label confusion matrix.
+    """
+    tasks = [(path, batch_index) for path in export_paths for batch_index in range(_count_batches(path))]
+    confusion_by_path = {path: np.zeros((len(LABEL_IDS), len(LABEL_IDS)), dtype=np.int64) for path in export_paths}
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(vectorizer_path, model_path, reprocess)) as executor:
+        for path, confusion in executor.map(_rescore_batch, tasks):
+            confusion_by_path[path] += confusion
+    return confusion_by_path
+
+
+def print_report(report):
+    labels = [LABEL_MAPPING[label_id] for label_id in LABEL_IDS]
+    print(f"\n{'channel':<40} {'analyses':>8} {'sentences':>10} {'changed':>8}  " + "  ".join(f"{label:>16}" for label in labels))
+    for entry in report['channels']:
+        shifts = "  ".join(f"{entry['old_distribution_pct'][label]:6.2f}->{entry['new_distribution_pct'][label]:6.2f}%" for label in labels)
+        print(f"{str(entry['channel'])[:40]:<40} {entry['analyses']:8d} {entry['sentences']:10d} "
+              f"{entry['changed_fraction'] * 100:7.2f}%  {shifts}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Re-score stored analyses (see analysis_export.py) with a new model, without re-scraping.")
+    parser.add_argument('--vectorizer', required=True, help="Path to the new vectorizer .pkl")
+    parser.add_argument('--model', required=True, help="Path to the new model .pkl")
+    parser.add_argument('--export-dir', default=ANALYSIS_EXPORT_DIR, help="Directory with exported analyses.")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count).")
+    parser.add_argument('--reprocess', action='store_true', help="Re-run preprocessing on the stored sentences instead of using the cached processed text.")
+    parser.add_argument('--report', default='rescore_report.json', help="Where to write the JSON diff report.")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    export_paths = list_analysis_exports(args.export_dir)
+    if not export_paths:
+        print(f"No exported analyses found in '{args.export_dir}'. Enable ANALYSIS_EXPORT_ENABLED to record them.", file=sys.stderr)
+        sys.exit(1)
+
+    start = time.perf_counter()
+    confusion_by_path = rescore_exports(export_paths, args.vectorizer, args.model, args.workers, args.reprocess)
+    report = build_report(confusion_by_path)
+    elapsed = time.perf_counter() - start
+
+    print_report(report)
+    total_sentences = sum(entry['sentences'] for entry in report['channels'])
+    print(f"\nRe-scored {total_sentences} sentences from {len(report['analyses'])} analyses of "
+          f"{len(report['channels'])} channels in {elapsed:.1f}s "
+          f"({total_sentences / elapsed if elapsed else 0:.0f} sentences/sec).")
+    with open(args.report, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"Report written to {args.report}")
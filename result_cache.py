@@ -0,0 +1,88 @@
+import json
+import os
+import sqlite3
+import sys
+import time
+
+from config import RESULT_CACHE_PATH, RESULT_CACHE_TTL_SECONDS
+
+
+def make_cache_key(url_info, message_limit, sampling=None):
+    """
+    Builds the cache key for an analysis from the output of parse_telegram_url, the message limit and
+    the sampled-estimate settings, if any.
+    The original URL is deliberately left out so that e.g. http/https or t.me/telegram.me variants share an entry.
+    """
+    is_channel = url_info.get('type') == 'channel_or_group'
+    key_parts = {
+        'type': url_info.get('type'),
+        'identifier': url_info.get('identifier'),
+        'message_id': url_info.get('message_id'),
+        'message_limit': message_limit if is_channel and not sampling else None,
+    }
+    if is_channel and sampling:
+        key_parts['sampling'] = sampling
+    return json.dumps(key_parts, sort_keys=True)
+
+
+class ResultCache:
+    """
+    SQLite-backed store of finished analysis results with a TTL.
+    A connection is opened per operation so the cache can be shared by threads and gunicorn workers.
+    Hit/miss counters live in the same database, so the reported hit rate covers all workers.
+    """
+
+    def __init__(self, path=RESULT_CACHE_PATH, ttl_seconds=RESULT_CACHE_TTL_SECONDS):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        cache_dir = os.path.dirname(path)
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS results (cache_key TEXT PRIMARY KEY, results_json TEXT NOT NULL, created_at REAL NOT NULL)")
+            conn.execute("CREATE TABLE IF NOT EXISTS stats (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            conn.execute("INSERT OR IGNORE INTO stats (name, value) VALUES ('hits', 0), ('misses', 0)")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10)
+
+    def get(self, cache_key):
+        """
+        Looks up a cached result and records a hit or miss.
+        Returns:
+            tuple: (results dict, age in seconds) or (None, None) on a miss.
+        """
+        try:
+            with self._connect() as conn:
+                row = conn.execute("SELECT results_json, created_at FROM results WHERE cache_key = ?", (cache_key,)).fetchone()
+                conn.execute("UPDATE stats SET value = value + 1 WHERE name = ?", ('hits' if row else 'misses',))
+        except sqlite3.Error as e:
+            print(f"Warning: result cache lookup failed: {e}", file=sys.stderr)
+            return None, None
+
+        if row is None:
+            return None, None
+        results_json, created_at = row
+        return json.loads(results_json), max(0.0, time.time() - created_at)
+
+    def set(self, cache_key, results):
+        """Stores (or replaces) the result for a key, stamping it with the current time."""
+        try:
+            with self._connect() as conn:
+                conn.execute("INSERT OR REPLACE INTO results (cache_key, results_json, created_at) VALUES (?, ?, ?)",
+                             (cache_key, json.dumps(results, ensure_ascii=False), time.time()))
+        except sqlite3.Error as e:
+            print(f"Warning: result cache write failed: {e}", file=sys.stderr)
+
+    def is_stale(self, age_seconds):
+        return age_seconds >= self.ttl_seconds
+
+    def hit_rate(self):
+        """Returns the fraction of lookups served from the cache (0.0 when nothing was looked up yet)."""
+        try:
+            with self._connect() as conn:
+                stats = dict(conn.execute("SELECT name, value FROM stats").fetchall())
+        except sqlite3.Error:
+            return 0.0
+        lookups = stats.get('hits', 0) + stats.get('misses', 0)
+        return stats.get('hits', 0) / lookups if lookups else 0.0
@@ -0,0 +1,159 @@
+from array import array
+import numpy as np
+
+
+TEXT_ENCODING = 'utf-16-le'
+
+
+class ScrapedCorpus:
+    """
+    Columnar store for the messages and comments scraped from a channel/group.
+
+    Every text (a message or one of its comments) is a row. All texts are concatenated into a single
+    UTF-16-LE buffer addressed by an offsets array (Ethiopic script takes 2 bytes per character in
+    UTF-16 but 3 in UTF-8). Three int64 columns hold the row's Telegram message id, the row index of
+    its parent message (-1 for top-level messages) and its date as Unix seconds (0 if unknown). Compared to a list of
+    {'message_id', 'message_text', 'comments': [...]} dicts this avoids a dict, a list and a str object
+    per message/comment, and the columns can be handed to numpy without copying.
+    """
+
+    def __init__(self):
+        self._text_buffer = bytearray()
+        self._text_offsets = array('q', [0])
+        self._message_ids = array('q')
+        self._parent_rows = array('q')
+        self._dates = array('q')
+        self._messages_with_comments = 0
+        self._last_parent_with_comment = -1
+
+    def _append(self, message_id, text, parent_row, date):
+        self._text_buffer += text.encode(TEXT_ENCODING)
+        self._text_offsets.append(len(self._text_buffer))
+        self._message_ids.append(message_id)
+        self._parent_rows.append(parent_row)
+        self._dates.append(date)
+        return len(self._message_ids) - 1
+
+    def add_message(self, message_id, text, date=0):
+        """Appends a top-level message posted at date (Unix seconds) and returns its row index."""
+        return self._append(message_id, text, -1, date)
+
+    def add_comment(self, parent_row, comment_id, text, date=0):
+        """Appends a comment (reply) to the message stored at parent_row and returns its row index."""
+        if parent_row != self._last_parent_with_comment:
+            self._messages_with_comments += 1
+            self._last_parent_with_comment = parent_row
+        return self._append(comment_id, text, parent_row, date)
+
+    def __len__(self):
+        return len(self._message_ids)
+
+    def __iter__(self):
+        """Iterates over all texts (messages and comments) in row order, which is what the classifier consumes."""
+        return self.iter_texts()
+
+    def __getitem__(self, row):
+        return self.text(row)
+
+    def text(self, row):
+        return self._text_buffer[self._text_offsets[row]:self._text_offsets[row + 1]].decode(TEXT_ENCODING)
+
+    def iter_texts(self, rows=None):
+        """Yields the texts of the given rows (all rows by default)."""
+        buffer = memoryview(self._text_buffer)
+        offsets = self._text_offsets
+        for row in (range(len(self)) if rows is None else rows):
+            yield str(buffer[offsets[row]:offsets[row + 1]], TEXT_ENCODING)
+
+    def iter_messages(self):
+        """Yields (message_id, message_text, [comment texts]) per top-level message, like the old per-message dicts."""
+        parent_rows = self.parent_rows
+        message_rows = np.flatnonzero(parent_rows < 0)
+        comment_rows = np.flatnonzero(parent_rows >= 0)
+        # Comments are appended right after their parent, so each message's comments form a contiguous run.
+        comment_parents = parent_rows[comment_rows]
+        for message_row in message_rows:
+            lo, hi = np.searchsorted(comment_parents, [message_row, message_row + 1])
+            yield int(self._message_ids[message_row]), self.text(message_row), list(self.iter_texts(comment_rows[lo:hi]))
+
+    @property
+    def message_ids(self):
+        """int64 array of Telegram message ids, one per row."""
+        return np.frombuffer(self._message_ids, dtype=np.int64) if len(self) else np.empty(0, dtype=np.int64)
+
+    @property
+    def parent_rows(self):
+        """int64 array with the parent message's row for comments and -1 for top-level messages."""
+        return np.frombuffer(self._parent_rows, dtype=np.int64) if len(self) else np.empty(0, dtype=np.int64)
+
+    @property
+    def dates(self):
+        """int64 array of message/comment dates in Unix seconds (0 where unknown), one per row."""
+        return np.frombuffer(self._dates, dtype=np.int64) if len(self) else np.empty(0, dtype=np.int64)
+
+    @property
+    def parent_message_ids(self):
+        """int64 array with the parent message's Telegram id for comments and -1 for top-level messages."""
+        parent_rows = self.parent_rows
+        return np.where(parent_rows >= 0, self.message_ids[np.maximum(parent_rows, 0)], -1)
+
+    @property
+    def text_offsets(self):
+        """int64 array of len(self) + 1 byte offsets into the concatenated UTF-16-LE text buffer."""
+        return np.frombuffer(self._text_offsets, dtype=np.int64)
+
+    @property
+    def message_count(self):
+        return int(np.count_nonzero(self.parent_rows < 0))
+
+    @property
+    def comment_count(self):
+        return len(self) - self.message_count
+
+    @property
+    def messages_with_comments(self):
+        return self._messages_with_comments
+
+    def nbytes(self):
+        """Approximate memory held by the corpus buffers."""
+        return (len(self._text_buffer) + self._text_offsets.itemsize * len(self._text_offsets)
+                + self._message_ids.itemsize * len(self._message_ids) + self._parent_rows.itemsize * len(self._parent_rows)
+                + self._dates.itemsize * len(self._dates))
+
+    @classmethod
+    def from_records(cls, channel_content_data):
+        """Builds a corpus from the legacy list of {'message_id', 'message_text', 'comments'} dicts."""
+        corpus = cls()
+        for item in channel_content_data:
+            message_row = corpus.add_message(item['message_id'], item['message_text'])
+            for comment_text in item['comments']:
+                corpus.add_comment(message_row, 0, comment_text)
+        return corpus
+
+
+# Example usage (compares memory against the list-of-dicts representation)
+if __name__ == "__main__":
+    import tracemalloc
+
+    n_messages, comments_per_message = 100000, 5
+    message_text = "ይህ የሙከራ መልእክት ነው። በብዙ ዓረፍተ ነገሮች አማርኛ እየጻፍኩ ነው።"
+    comment_text = "እንዴት ነህ? የፖለቲካ ንግግር እና የጥላቻ ንግግር ልዩነት አለ።"
+
+    tracemalloc.start()
+    records = [{'message_id': i, 'message_text': f"{message_text} {i}",
+                'comments': [f"{comment_text} {i}-{j}" for j in range(comments_per_message)]} for i in range(n_messages)]
+    records_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    tracemalloc.start()
+    corpus = ScrapedCorpus()
+    for i in range(n_messages):
+        row = corpus.add_message(i, f"{message_text} {i}")
+        for j in range(comments_per_message):
+            corpus.add_comment(row, i * 100 + j, f"{comment_text} {i}-{j}")
+    corpus_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    print(f"{n_messages} messages x {comments_per_message} comments")
+    print(f"list of dicts:  {records_bytes / 1e6:8.1f} MB")
+    print(f"ScrapedCorpus:  {corpus_bytes / 1e6:8.1f} MB ({records_bytes / corpus_bytes:.1f}x smaller, {corpus.nbytes() / 1e6:.1f} MB of buffers)")
@@ -0,0 +1,161 @@
+import multiprocessing
+import os
+import random
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+from config import (
+    INFERENCE_BACKEND, LABEL_MAPPING, NEAR_DUPLICATE_COLLAPSE_ENABLED, NEAR_DUPLICATE_THRESHOLD,
+    SHADOW_SAMPLE_RATE, SHADOW_MAX_PENDING_BATCHES,
+)
+from inference import load_inference_backend
+from analysis_service import AnalysisService
+
+# Rows of the confusion matrix follow the served model's label, columns the candidate's, in sorted(LABEL_MAPPING) order.
+LABEL_IDS = sorted(LABEL_MAPPING)
+# Per-batch latencies kept for the percentiles in the report.
+LATENCY_WINDOW = 1000
+
+# Added to the shadow process's niceness, so on a busy machine the serving workers get the CPU first.
+SHADOW_PROCESS_NICENESS = 19
+
+# Set in the shadow process by _init_worker so the candidate is loaded once, not per batch.
+_worker_service = None
+
+
+def _init_worker(backend_name, version, collapse_near_duplicates, near_duplicate_threshold):
+    global _worker_service
+    if hasattr(os, 'nice'):
+        os.nice(SHADOW_PROCESS_NICENESS)
+    _worker_service = AnalysisService(load_inference_backend(backend_name, version),
+                                      collapse_near_duplicates=collapse_near_duplicates,
+                                      near_duplicate_threshold=near_duplicate_threshold)
+
+
+def _predict_candidate(processed_sentences):
+    """Runs in the shadow process: (candidate label ids, CPU seconds), classified exactly like a served batch."""
+    start = time.process_time()
+    label_ids = _worker_service.predict_sentences(processed_sentences)[0]
+    return label_ids, time.process_time() - start
+
+
+class ShadowEvaluator:
+    """
+    Compares a candidate model version with the served one on live traffic.
+    A random sample of classified batches is sent to a separate process that classifies the same
+    preprocessed sentences with the candidate, so neither the user-facing response nor the worker's
+    GIL is held up by it. The process runs at the lowest CPU priority, and at most max_pending sampled
+    batches are in flight; further ones are dropped (and counted) while the candidate is busy.
+    Latencies are CPU time, so the niceness and the serving load do not skew the comparison.
+    """
+
+    def __init__(self, version, backend_name=INFERENCE_BACKEND, sample_rate=SHADOW_SAMPLE_RATE,
+                 max_pending=SHADOW_MAX_PENDING_BATCHES, collapse_near_duplicates=NEAR_DUPLICATE_COLLAPSE_ENABLED,
+                 near_duplicate_threshold=NEAR_DUPLICATE_THRESHOLD, seed=None):
+        self.version = version
+        self.sample_rate = sample_rate
+        self.max_pending = max_pending
+        self._random = random.Random(seed)
+        # spawn, not fork: the serving process has other threads running (reloader, cache refreshes).
+        self._executor = ProcessPoolExecutor(
+            max_workers=1, mp_context=multiprocessing.get_context('spawn'), initializer=_init_worker,
+            initargs=(backend_name, version, collapse_near_duplicates, near_duplicate_threshold))
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._confusion = np.zeros((len(LABEL_IDS), len(LABEL_IDS)), dtype=np.int64)
+            self._batches = {'sampled': 0, 'compared': 0, 'dropped': 0, 'failed': 0}
+            self._latencies = {'served': deque(maxlen=LATENCY_WINDOW), 'candidate': deque(maxlen=LATENCY_WINDOW)}
+            self._seconds = {'served': 0.0, 'candidate': 0.0}
+            self._served_versions = set()
+
+    def maybe_submit(self, processed_sentences, served_labels, served_seconds, served_version):
+        """
+        Samples the batch with probability sample_rate and, if sampled, schedules the comparison.
+        served_labels are the label ids the user got for processed_sentences, computed in served_seconds of CPU time.
+        Returns True if the batch was scheduled.
+        """
+        if self._random.random() >= self.sample_rate:
+            return False
+        with self._lock:
+            self._batches['sampled'] += 1
+            if self._pending >= self.max_pending:
+                self._batches['dropped'] += 1
+                return False
+            self._pending += 1
+        served_labels = np.asarray(served_labels)
+        try:
+            future = self._executor.submit(_predict_candidate, processed_sentences)
+        except Exception:
+            with self._lock:
+                self._pending -= 1
+                self._batches['failed'] += 1
+            raise
+        future.add_done_callback(lambda f: self._record(f, served_labels, served_seconds, served_version))
+        return True
+
+    def _record(self, future, served_labels, served_seconds, served_version):
+        try:
+            candidate_labels, candidate_seconds = future.result()
+            if len(candidate_labels) != len(served_labels):
+                raise ValueError(f"candidate returned {len(candidate_labels)} labels for {len(served_labels)} sentences")
+            served_positions = np.searchsorted(LABEL_IDS, served_labels)
+            candidate_positions = np.searchsorted(LABEL_IDS, candidate_labels)
+            with self._lock:
+                np.add.at(self._confusion, (served_positions, candidate_positions), 1)
+                self._batches['compared'] += 1
+                self._latencies['served'].append(served_seconds)
+                self._latencies['candidate'].append(candidate_seconds)
+                self._seconds['served'] += served_seconds
+                self._seconds['candidate'] += candidate_seconds
+                self._served_versions.add(served_version)
+        except Exception as e:
+            with self._lock:
+                self._batches['failed'] += 1
+            print(f"Warning: shadow evaluation of candidate '{self.version}' failed: {e}", file=sys.stderr)
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def report(self):
+        """Agreement, confusion (served -> candidate) and per-model latency over the compared batches."""
+        with self._lock:
+            confusion = self._confusion.copy()
+            batches = dict(self._batches)
+            latencies = {model: np.array(values) for model, values in self._latencies.items()}
+            seconds = dict(self._seconds)
+            served_versions = sorted(str(v) for v in self._served_versions)
+
+        sentences = int(confusion.sum())
+        served_counts = confusion.sum(axis=1)
+        report = {
+            'candidate_version': self.version,
+            'served_versions': served_versions,
+            'sample_rate': self.sample_rate,
+            'batches': batches,
+            'sentences_compared': sentences,
+            'agreement_rate': float(np.trace(confusion) / sentences) if sentences else None,
+            # Of the sentences the served model gave this label, the share the candidate labelled the same.
+            'agreement_by_label': {LABEL_MAPPING[label_id]: float(confusion[i, i] / served_counts[i]) if served_counts[i] else None
+                                   for i, label_id in enumerate(LABEL_IDS)},
+            'confusion': {f"{LABEL_MAPPING[LABEL_IDS[i]]}->{LABEL_MAPPING[LABEL_IDS[j]]}": int(confusion[i, j])
+                          for i in range(len(LABEL_IDS)) for j in range(len(LABEL_IDS))},
+            'latency': {},
+        }
+        for model, values in latencies.items():
+            report['latency'][model] = {
+                'batch_cpu_ms_p50': float(np.percentile(values, 50) * 1000) if len(values) else None,
+                'batch_cpu_ms_p95': float(np.percentile(values, 95) * 1000) if len(values) else None,
+                'sentences_per_cpu_sec': sentences / seconds[model] if seconds[model] else None,
+            }
+        return report
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
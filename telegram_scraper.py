@@ -1,6 +1,8 @@
 import re
 import asyncio
+import random
 import sys
+import threading
 from telethon import TelegramClient
 from telethon.sessions import StringSession
 from telethon.errors.rpcerrorlist import ChannelPrivateError, MessageNotModifiedError, FloodWaitError, PeerIdInvalidError, UserNotParticipantError
@@ -9,7 +11,11 @@ from telethon.tl.functions.channels import GetMessagesRequest
 from urllib.parse import urlparse
 from tqdm.asyncio import tqdm as async_tqdm
 
-from config import TELEGRAM_API_ID, TELEGRAM_API_HASH, TELEGRAM_SESSION_NAME, TELEGRAM_SESSION_STRING
+from scraped_corpus import ScrapedCorpus
+from config import (
+    TELEGRAM_API_ID, TELEGRAM_API_HASH, TELEGRAM_SESSION_NAME, TELEGRAM_SESSION_STRING, TELEGRAM_CLIENT_BACKEND,
+    MULTI_CHANNEL_MAX_CONCURRENCY,
+)
 
 # --- REMOVED GLOBAL CLIENT INITIALIZATION AND CONNECT/DISCONNECT FUNCTIONS ---
 # The client will now be instantiated and managed within each scraping function.
@@ -52,15 +58,42 @@ async def parse_telegram_url(url):
     return {'type': 'invalid'}
 
 
+def _make_telethon_client():
+    if TELEGRAM_SESSION_STRING:
+        return TelegramClient(StringSession(TELEGRAM_SESSION_STRING), TELEGRAM_API_ID, TELEGRAM_API_HASH)
+    return TelegramClient(TELEGRAM_SESSION_NAME, TELEGRAM_API_ID, TELEGRAM_API_HASH)
+
+
+def _make_fake_client():
+    # Imported here so real deployments never load the test double.
+    from fake_telegram import FakeTelegramClient
+    return FakeTelegramClient()
+
+
+# Client backends: name -> factory returning an unconnected client. Besides TelegramClient itself, a client only
+# needs what this module calls: start, is_user_authorized, is_connected, disconnect, get_entity, iter_messages
+# (limit, offset_id, min_id, reverse, reply_to) and being called with a GetMessagesRequest.
+TELEGRAM_CLIENT_BACKENDS = {
+    'telethon': _make_telethon_client,
+    'fake': _make_fake_client,
+}
+
+
+def make_telegram_client(backend_name=None):
+    """Creates a client of the given backend (TELEGRAM_CLIENT_BACKEND by default)."""
+    backend_name = backend_name or TELEGRAM_CLIENT_BACKEND
+    factory = TELEGRAM_CLIENT_BACKENDS.get(backend_name)
+    if factory is None:
+        raise ValueError(f"Unknown Telegram client backend '{backend_name}'. Available: {', '.join(sorted(TELEGRAM_CLIENT_BACKENDS))}")
+    return factory()
+
+
 async def _run_telethon_client_task(task_coroutine):
     """
     Manages the lifecycle of a Telethon client for a single asynchronous task.
     Instantiates, connects, runs task, disconnects.
     """
-    if TELEGRAM_SESSION_STRING:
-        current_client = TelegramClient(StringSession(TELEGRAM_SESSION_STRING), TELEGRAM_API_ID, TELEGRAM_API_HASH)
-    else:
-        current_client = TelegramClient(TELEGRAM_SESSION_NAME, TELEGRAM_API_ID, TELEGRAM_API_HASH)
+    current_client = make_telegram_client()
 
     try:
         # print("DEBUG: Connecting Telethon client for this request...", file=sys.stderr)
@@ -83,24 +116,31 @@ async def _run_telethon_client_task(task_coroutine):
             # print("DEBUG: Telethon client disconnected for request.", file=sys.stderr)
 
 
-async def _get_entity_internal(client, identifier):
-    """Internal helper to get entity, run within a _run_telethon_client_task."""
-    entity = None
+async def _get_entity_internal(client, identifier, entity_cache=None):
+    """
+    Internal helper to get entity, run within a _run_telethon_client_task.
+    When an entity_cache dict is given, resolved entities are reused across calls on the same client.
+    """
+    if entity_cache is not None and identifier in entity_cache:
+        return entity_cache[identifier]
     try:
         entity = await client.get_entity(identifier)
-        if isinstance(entity, User):
-            raise ValueError(f"Error: '{identifier}' is a user, not a channel or group. Analysis is for channels/groups.", file=sys.stderr)
-        if not isinstance(entity, (Channel, Chat)):
-             raise ValueError(f"Error: Unknown entity type for '{identifier}'. Must be a channel or group.", file=sys.stderr)
-        return entity
     except PeerIdInvalidError:
-        raise ValueError(f"Error: Channel/group '{identifier}' not found or invalid ID. Please check the URL.", file=sys.stderr)
+        raise ValueError(f"Error: Channel/group '{identifier}' not found or invalid ID. Please check the URL.")
     except UserNotParticipantError:
-        raise ValueError(f"Error: You are not a participant in channel/group '{identifier}'. Cannot fetch content.", file=sys.stderr)
+        raise ValueError(f"Error: You are not a participant in channel/group '{identifier}'. Cannot fetch content.")
     except Exception as e:
         # Re-raise the original exception to be caught by _run_telethon_client_task
         raise RuntimeError(f"An unexpected error occurred while getting channel/group entity for '{identifier}': {e}") from e
 
+    if isinstance(entity, User):
+        raise ValueError(f"Error: '{identifier}' is a user, not a channel or group. Analysis is for channels/groups.")
+    if not isinstance(entity, (Channel, Chat)):
+        raise ValueError(f"Error: Unknown entity type for '{identifier}'. Must be a channel or group.")
+    if entity_cache is not None:
+        entity_cache[identifier] = entity
+    return entity
+
 # Wrapper function for external calls to _get_entity
 async def _get_entity(identifier):
     return await _run_telethon_client_task(lambda client: _get_entity_internal(client, identifier))
@@ -113,7 +153,7 @@ async def _get_telegram_comments_for_message_internal(client, channel_identifier
 
     target_message = None
     try:
-        messages_response = await client(GetMessagesRequest(peer=entity, id=[message_id]))
+        messages_response = await client(GetMessagesRequest(channel=entity, id=[message_id]))
         if messages_response.messages:
             target_message = messages_response.messages[0]
         if not target_message or target_message.id != message_id:
@@ -150,17 +190,58 @@ async def get_telegram_comments_for_message(channel_identifier, message_id):
     return await _run_telethon_client_task(lambda client: _get_telegram_comments_for_message_internal(client, channel_identifier, message_id))
 
 
-async def _get_channel_or_group_content_internal(client, identifier, message_limit):
-    """Internal helper for channel/group content, run within a _run_telethon_client_task."""
-    channel_content_data = []
+def _message_date(message):
+    """A message's date as Unix seconds, the compact form stored in ScrapedCorpus (0 if Telegram sent none)."""
+    return int(message.date.timestamp()) if message.date else 0
+
+
+async def _get_message_comments_internal(client, entity, message_id, entity_cache):
+    """
+    Returns the comments on a channel/group message as a list of (comment id, text, date): replies in the
+    linked discussion group if there is one, otherwise direct replies in the chat itself.
+    """
+    comments_for_message = []
+    if isinstance(entity, Channel) and hasattr(entity, 'linked_chat_id') and entity.linked_chat_id:
+        try:
+            discussion_group = await _get_entity_internal(client, entity.linked_chat_id, entity_cache)
+            async for comment_msg in client.iter_messages(discussion_group, reply_to=message_id):
+                if comment_msg.text:
+                    comments_for_message.append((comment_msg.id, comment_msg.text, _message_date(comment_msg)))
+        except FloodWaitError as e:
+            await asyncio.sleep(e.seconds + 1)
+        except Exception as e:
+            pass
+
+    if not comments_for_message:
+        try:
+            async for comment_msg in client.iter_messages(entity, reply_to=message_id):
+                if comment_msg.text:
+                    comments_for_message.append((comment_msg.id, comment_msg.text, _message_date(comment_msg)))
+        except FloodWaitError as e:
+            await asyncio.sleep(e.seconds + 1)
+        except Exception as e:
+            pass
+    return comments_for_message
+
+
+async def _get_channel_or_group_content_internal(client, identifier, message_limit, entity_cache=None, min_id=0, reverse=False):
+    """
+    Internal helper for channel/group content, run within a _run_telethon_client_task.
+    Messages and their comments are collected into a columnar ScrapedCorpus.
+    Only messages newer than min_id are read; with reverse=True they are read oldest first, so a
+    limited scrape continues from min_id instead of skipping to the newest messages.
+    """
+    channel_content_data = ScrapedCorpus()
     messages_with_comments_count = 0
     total_comments_retrieved = 0
 
-    entity = await _get_entity_internal(client, identifier) # Use internal entity helper
+    if entity_cache is None:
+        entity_cache = {}
+    entity = await _get_entity_internal(client, identifier, entity_cache) # Use internal entity helper
 
     entity_type_name = type(entity).__name__
     messages_fetched_count = 0
-    messages_iter = client.iter_messages(entity, limit=message_limit)
+    messages_iter = client.iter_messages(entity, limit=message_limit, min_id=min_id, reverse=reverse)
 
     pbar = async_tqdm(total=message_limit if message_limit else None, desc=f"Scraping messages from {entity.title}", unit="msg")
     
@@ -182,36 +263,15 @@ async def _get_channel_or_group_content_internal(client, identifier, message_lim
             break
 
         if message.text and message.id:
-            message_data = {'message_id': message.id, 'message_text': message.text, 'comments': []}
-            
-            comments_for_message = []
-            if isinstance(entity, Channel) and hasattr(entity, 'linked_chat_id') and entity.linked_chat_id:
-                try:
-                    discussion_group = await client.get_entity(entity.linked_chat_id)
-                    async for comment_msg in client.iter_messages(discussion_group, reply_to=message.id):
-                        if comment_msg.text:
-                            comments_for_message.append(comment_msg.text)
-                except FloodWaitError as e:
-                    await asyncio.sleep(e.seconds + 1)
-                except Exception as e:
-                    pass
-            
-            if not comments_for_message:
-                try:
-                    async for comment_msg in client.iter_messages(entity, reply_to=message.id):
-                        if comment_msg.text:
-                            comments_for_message.append(comment_msg.text)
-                except FloodWaitError as e:
-                    await asyncio.sleep(e.seconds + 1)
-                except Exception as e:
-                    pass
+            comments_for_message = await _get_message_comments_internal(client, entity, message.id, entity_cache)
 
+            message_row = channel_content_data.add_message(message.id, message.text, _message_date(message))
             if comments_for_message:
                 messages_with_comments_count += 1
                 total_comments_retrieved += len(comments_for_message)
-                message_data['comments'] = comments_for_message
+                for comment_id, comment_text, comment_date in comments_for_message:
+                    channel_content_data.add_comment(message_row, comment_id, comment_text, comment_date)
 
-            channel_content_data.append(message_data)
             messages_fetched_count += 1
         
         if message_limit and messages_fetched_count >= message_limit:
@@ -221,8 +281,160 @@ async def _get_channel_or_group_content_internal(client, identifier, message_lim
     return channel_content_data, messages_with_comments_count, total_comments_retrieved
 
 # Wrapper function for external calls to get_channel_or_group_content
-async def get_channel_or_group_content(identifier, message_limit=None):
-    return await _run_telethon_client_task(lambda client: _get_channel_or_group_content_internal(client, identifier, message_limit))
+async def get_channel_or_group_content(identifier, message_limit=None, min_id=0, reverse=False):
+    return await _run_telethon_client_task(lambda client: _get_channel_or_group_content_internal(
+        client, identifier, message_limit, min_id=min_id, reverse=reverse))
+
+
+class ScrapeConcurrencyLimiter:
+    """
+    Async context manager capping how many channels are scraped at once across all requests in the process.
+    Every request runs its coroutines on its own event loop, so an asyncio.Semaphore cannot be shared
+    between them; this polls a threading.Semaphore instead, without blocking the loop while it waits.
+    """
+
+    POLL_SECONDS = 0.05
+
+    def __init__(self, limit):
+        self.limit = limit
+        self._semaphore = threading.BoundedSemaphore(limit)
+
+    async def __aenter__(self):
+        while not self._semaphore.acquire(blocking=False):
+            await asyncio.sleep(self.POLL_SECONDS)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self._semaphore.release()
+
+
+# Shared by every /analyze/multi request in this process (per gunicorn worker).
+MULTI_CHANNEL_SCRAPE_LIMITER = ScrapeConcurrencyLimiter(MULTI_CHANNEL_MAX_CONCURRENCY)
+
+
+async def _get_multiple_channels_content_internal(client, identifiers, message_limit, limiter):
+    """
+    Internal helper that scrapes several channels/groups concurrently on one client.
+    A channel is only scraped while it holds a slot of limiter, and resolved entities (including
+    linked discussion groups) are shared between them.
+    Returns:
+        dict: identifier -> (ScrapedCorpus, messages_with_comments_count, total_comments_retrieved),
+              or the exception raised while scraping that identifier.
+    """
+    entity_cache = {}
+
+    async def scrape_one(identifier):
+        async with limiter:
+            try:
+                return await _get_channel_or_group_content_internal(client, identifier, message_limit, entity_cache)
+            except Exception as e:
+                print(f"Error scraping '{identifier}' during multi-channel scrape: {e}", file=sys.stderr)
+                return e
+
+    unique_identifiers = list(dict.fromkeys(identifiers))
+    results = await asyncio.gather(*(scrape_one(identifier) for identifier in unique_identifiers))
+    return dict(zip(unique_identifiers, results))
+
+# Wrapper function for external calls to get_multiple_channels_content
+async def get_multiple_channels_content(identifiers, message_limit=None, limiter=None):
+    limiter = limiter or MULTI_CHANNEL_SCRAPE_LIMITER
+    return await _run_telethon_client_task(lambda client: _get_multiple_channels_content_internal(client, identifiers, message_limit, limiter))
+
+
+async def _get_message_block_internal(client, entity, block_index, block_size, entity_cache):
+    """
+    Reads the text messages with ids in (block_index * block_size, (block_index + 1) * block_size] together
+    with their comments. Returns a list of (message id, text, date, [(comment id, text, date), ...]).
+    """
+    while True:
+        try:
+            block_messages = []
+            # offset_id jumps straight to the block's upper end; min_id stops at its lower end.
+            async for message in client.iter_messages(entity, offset_id=(block_index + 1) * block_size + 1,
+                                                      min_id=block_index * block_size, limit=block_size):
+                if message.text and message.id:
+                    block_messages.append((message.id, message.text, _message_date(message)))
+            break
+        except FloodWaitError as e:
+            print(f"FloodWait while sampling {entity.title}: Waiting for {e.seconds} seconds...", file=sys.stderr)
+            await asyncio.sleep(e.seconds + 1)
+
+    block = []
+    for message_id, message_text, message_date in block_messages:
+        block.append((message_id, message_text, message_date, await _get_message_comments_internal(client, entity, message_id, entity_cache)))
+    return block
+
+
+async def _sample_channel_or_group_content_internal(client, identifier, on_round, block_size, blocks_per_round, max_messages, seed=None):
+    """
+    Samples a channel/group across its whole message-id range instead of reading it from the newest message down.
+    The id range 1..newest id is split into blocks of block_size ids; blocks are drawn at random without
+    replacement and each one is read with its comments (the blocks of a round are fetched concurrently).
+    After every round, on_round(round_corpus, row_blocks, round_block_count, total_blocks) is called with the
+    newly scraped texts, the position within the round of the block each row came from, the number of blocks
+    drawn in the round (some may be empty) and the number of blocks in the channel; sampling stops
+    when it returns True, once max_messages messages were read, or when every block has been drawn.
+    Returns:
+        tuple: (ScrapedCorpus with everything sampled, dict describing the sample)
+    """
+    entity_cache = {}
+    entity = await _get_entity_internal(client, identifier, entity_cache)
+    newest_message_id = 0
+    async for message in client.iter_messages(entity, limit=1):
+        newest_message_id = message.id
+
+    total_blocks = -(-newest_message_id // block_size)
+    block_order = list(range(total_blocks))
+    random.Random(seed).shuffle(block_order)
+
+    sampled_corpus = ScrapedCorpus()
+    messages_with_comments_count = 0
+    total_comments_retrieved = 0
+    blocks_drawn = 0
+    stop_reason = 'exhausted'
+    while blocks_drawn < total_blocks:
+        if max_messages and sampled_corpus.message_count >= max_messages:
+            stop_reason = 'budget'
+            break
+        round_blocks = block_order[blocks_drawn:blocks_drawn + blocks_per_round]
+        blocks = await asyncio.gather(*(_get_message_block_internal(client, entity, block_index, block_size, entity_cache)
+                                        for block_index in round_blocks))
+
+        round_corpus = ScrapedCorpus()
+        row_blocks = []
+        for round_position, block in enumerate(blocks):
+            for message_id, message_text, message_date, comments in block:
+                message_row = round_corpus.add_message(message_id, message_text, message_date)
+                sampled_row = sampled_corpus.add_message(message_id, message_text, message_date)
+                row_blocks.append(round_position)
+                if comments:
+                    messages_with_comments_count += 1
+                    total_comments_retrieved += len(comments)
+                for comment_id, comment_text, comment_date in comments:
+                    round_corpus.add_comment(message_row, comment_id, comment_text, comment_date)
+                    sampled_corpus.add_comment(sampled_row, comment_id, comment_text, comment_date)
+                    row_blocks.append(round_position)
+        blocks_drawn += len(round_blocks)
+
+        if on_round(round_corpus, row_blocks, len(round_blocks), total_blocks):
+            stop_reason = 'ci_width_reached'
+            break
+
+    sample_info = {
+        'newest_message_id': newest_message_id,
+        'block_size': block_size,
+        'blocks_sampled': blocks_drawn,
+        'blocks_total': total_blocks,
+        'messages_with_comments': messages_with_comments_count,
+        'total_comments_scraped': total_comments_retrieved,
+        'stop_reason': stop_reason,
+    }
+    return sampled_corpus, sample_info
+
+# Wrapper function for external calls to sample_channel_or_group_content
+async def sample_channel_or_group_content(identifier, on_round, block_size, blocks_per_round, max_messages=None, seed=None):
+    return await _run_telethon_client_task(lambda client: _sample_channel_or_group_content_internal(
+        client, identifier, on_round, block_size, blocks_per_round, max_messages, seed))
 
 
 # Example usage for testing this module independently:
@@ -246,12 +458,12 @@ async def main_scraper_test():
         if parsed_info['type'] == 'channel_or_group':
             print(f"Parsed: Channel/Group Identifier: {parsed_info['identifier']}")
             channel_content, msgs_with_comments, total_cmnts = await get_channel_or_group_content(parsed_info['identifier'], message_limit=5) # Limit for testing
-            print(f"\nRetrieved {len(channel_content)} messages from channel/group. {msgs_with_comments} had comments ({total_cmnts} total comments).")
-            for i, item in enumerate(channel_content):
-                print(f"--- Message {i+1} (ID: {item['message_id']}) ---")
-                print(f"Message: {item['message_text'][:100]}...")
-                if item['comments']:
-                    print(f"Comments ({len(item['comments'])}): {item['comments'][0][:100]}...")
+            print(f"\nRetrieved {channel_content.message_count} messages from channel/group. {msgs_with_comments} had comments ({total_cmnts} total comments).")
+            for i, (message_id, message_text, comments) in enumerate(channel_content.iter_messages()):
+                print(f"--- Message {i+1} (ID: {message_id}) ---")
+                print(f"Message: {message_text[:100]}...")
+                if comments:
+                    print(f"Comments ({len(comments)}): {comments[0][:100]}...")
                 else:
                     print("No comments.")
         elif parsed_info['type'] == 'message':
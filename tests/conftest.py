@@ -0,0 +1,10 @@
+import os
+import sys
+
+# The modules live flat in the repository root.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Importing app builds the Flask app; keep it from polling for models or writing caches during tests.
+os.environ.setdefault('MODEL_RELOAD_POLL_SECONDS', '0')
+os.environ.setdefault('RESULT_CACHE_ENABLED', '0')
+os.environ.setdefault('TREND_STORE_ENABLED', '0')
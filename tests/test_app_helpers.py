@@ -0,0 +1,29 @@
+from app import DEFAULT_MESSAGE_LIMIT, parse_message_limit, parse_sampling
+from config import SAMPLING_CI_WIDTH, SAMPLING_CONFIDENCE
+
+
+def test_parse_message_limit_accepts_positive_ints():
+    assert parse_message_limit('250') == 250
+
+
+def test_parse_message_limit_all_means_no_limit():
+    assert parse_message_limit('ALL') is None
+
+
+def test_parse_message_limit_falls_back_to_default():
+    for value in (None, '', 'abc', '0', '-5'):
+        assert parse_message_limit(value) == DEFAULT_MESSAGE_LIMIT
+
+
+def test_parse_sampling_reads_percentage_points():
+    assert parse_sampling('5') == {'ci_width': 0.05, 'confidence': SAMPLING_CONFIDENCE}
+    assert parse_sampling(' 2.5% ')['ci_width'] == 0.025
+
+
+def test_parse_sampling_default_uses_configured_width():
+    assert parse_sampling('default') == {'ci_width': SAMPLING_CI_WIDTH, 'confidence': SAMPLING_CONFIDENCE}
+
+
+def test_parse_sampling_rejects_empty_and_invalid():
+    for value in (None, '', 'abc', '0', '100', '-3'):
+        assert parse_sampling(value) is None
@@ -0,0 +1,29 @@
+import math
+
+from channel_sampling import BlockProportionEstimator
+
+
+def test_no_intervals_until_two_blocks():
+    estimator = BlockProportionEstimator(['hate', 'other'], total_blocks=100)
+    assert estimator.estimates()['hate'] == (None, None, None)
+    estimator.add_blocks([[1, 9]])
+    assert estimator.estimates()['hate'] == (0.1, None, None)
+    assert math.isinf(estimator.interval_widths(['hate'])['hate'])
+    assert not estimator.converged(0.5, ['hate'])
+
+
+def test_ratio_estimate_weights_blocks_by_size():
+    estimator = BlockProportionEstimator(['hate', 'other'], total_blocks=100)
+    estimator.add_blocks([[2, 8], [0, 30], [5, 5]])
+    proportion, low, high = estimator.estimates()['hate']
+    assert proportion == 7 / 50
+    assert 0.0 <= low < proportion < high <= 1.0
+    assert estimator.blocks_sampled == 3 and estimator.sentences_sampled == 50
+
+
+def test_interval_collapses_once_every_block_is_read():
+    estimator = BlockProportionEstimator(['hate', 'other'], total_blocks=3)
+    estimator.add_blocks([[2, 8], [0, 30], [5, 5]])
+    assert estimator.interval_widths() == {'hate': 0.0, 'other': 0.0}
+    assert estimator.converged(0.01, ['hate'])
+    assert not estimator.converged(0.01, ['hate'], min_blocks=4)
@@ -0,0 +1,23 @@
+from near_duplicates import cluster_near_duplicates
+
+
+def test_exact_duplicates_share_a_cluster_and_first_is_representative():
+    texts = ['ሰላም ለሁላችሁ', 'ሌላ ፍጹም የተለየ ዓረፍተ ነገር', 'ሰላም ለሁላችሁ']
+    representatives, cluster_of = cluster_near_duplicates(texts)
+    assert representatives == [0, 1]
+    assert cluster_of.tolist() == [0, 1, 0]
+
+
+def test_near_duplicates_are_clustered_and_distinct_texts_are_not():
+    base = 'this channel posts the same long forwarded message again and again every day'
+    texts = [base, base + '!', 'a completely unrelated sentence about the weather in addis ababa']
+    representatives, cluster_of = cluster_near_duplicates(texts, threshold=0.8)
+    assert cluster_of[0] == cluster_of[1]
+    assert cluster_of[2] != cluster_of[0]
+    assert representatives == [0, 2]
+
+
+def test_single_and_empty_inputs():
+    assert cluster_near_duplicates(['only one'])[1].tolist() == [0]
+    representatives, cluster_of = cluster_near_duplicates([])
+    assert representatives == [] and len(cluster_of) == 0
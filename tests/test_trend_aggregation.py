@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from trend_aggregation import SECONDS_PER_DAY, TrendAggregator, bucket_starts
+
+# 2024-01-01 00:00 UTC, a Monday.
+MONDAY = 1704067200
+
+
+def test_bucket_starts_by_day_and_week():
+    timestamps = [MONDAY + 3600, MONDAY + 2 * SECONDS_PER_DAY + 5, MONDAY + 7 * SECONDS_PER_DAY]
+    assert bucket_starts(timestamps, 'day').tolist() == [MONDAY, MONDAY + 2 * SECONDS_PER_DAY, MONDAY + 7 * SECONDS_PER_DAY]
+    assert bucket_starts(timestamps, 'week').tolist() == [MONDAY, MONDAY, MONDAY + 7 * SECONDS_PER_DAY]
+    with pytest.raises(ValueError):
+        bucket_starts(timestamps, 'month')
+
+
+def test_add_counts_labels_per_day_and_skips_undated():
+    aggregator = TrendAggregator('day')
+    aggregator.add([MONDAY + 10, MONDAY + 20, 0], [1, 0, 1])
+    aggregator.add([MONDAY + SECONDS_PER_DAY], [2])
+    histogram = aggregator.histogram()
+    assert list(histogram) == [MONDAY, MONDAY + SECONDS_PER_DAY]
+    # Columns follow sorted(LABEL_MAPPING): normal, hate, offensive.
+    assert histogram[MONDAY].tolist() == [1, 1, 0]
+    assert histogram[MONDAY + SECONDS_PER_DAY].tolist() == [0, 0, 1]
+
+
+def test_merge_rebuckets_daily_counts_into_weeks():
+    daily = TrendAggregator('day')
+    daily.add([MONDAY, MONDAY + 3 * SECONDS_PER_DAY, MONDAY + 8 * SECONDS_PER_DAY], [1, 1, 0])
+    weekly = TrendAggregator('week')
+    weekly.merge(daily.histogram())
+    weekly.merge({})
+    assert {start: counts.tolist() for start, counts in weekly.histogram().items()} == {
+        MONDAY: [0, 2, 0], MONDAY + 7 * SECONDS_PER_DAY: [1, 0, 0]}
+
+    rows = weekly.buckets()
+    assert rows[0]['start'] == '2024-01-01'
+    assert rows[0]['counts'] == {'normal': 0, 'hate': 2, 'offensive': 0}
+    assert rows[0]['percentages']['hate'] == 100.0
+
+
+def test_add_with_no_dated_sentences_is_a_no_op():
+    aggregator = TrendAggregator('week')
+    aggregator.add(np.zeros(3, dtype=np.int64), [0, 1, 2])
+    assert aggregator.histogram() == {}
@@ -0,0 +1,96 @@
+import time
+import numpy as np
+
+from config import LABEL_MAPPING
+
+# Histogram columns follow sorted(LABEL_MAPPING) order.
+LABEL_IDS = sorted(LABEL_MAPPING)
+SECONDS_PER_DAY = 86400
+GRANULARITIES = ('day', 'week')
+
+
+def bucket_starts(timestamps, granularity='day'):
+    """
+    Maps Unix timestamps to the start of their UTC day, or of their week (weeks start on Monday).
+    Vectorised: takes and returns int64 arrays.
+    """
+    days = np.asarray(timestamps, dtype=np.int64) // SECONDS_PER_DAY
+    if granularity == 'week':
+        # 1970-01-01 was a Thursday, so day 0 is 3 days after a Monday.
+        days = (days + 3) // 7 * 7 - 3
+    elif granularity != 'day':
+        raise ValueError(f"Unknown trend granularity '{granularity}'. Available: {', '.join(GRANULARITIES)}")
+    return days * SECONDS_PER_DAY
+
+
+class TrendAggregator:
+    """
+    Streaming per-bucket label histograms. Classified batches are added as they come and only the
+    counts are kept, so the memory used grows with the number of buckets, not the number of sentences.
+    Sentences with an unknown date (0) are not counted.
+    """
+
+    def __init__(self, granularity='day'):
+        bucket_starts(np.empty(0), granularity)  # validates the granularity
+        self.granularity = granularity
+        self._counts = {}
+
+    def add(self, timestamps, label_ids):
+        """Adds one classified batch: the date and label id of each sentence."""
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        label_ids = np.asarray(label_ids)
+        dated = timestamps > 0
+        if not dated.any():
+            return
+        starts, bucket_of = np.unique(bucket_starts(timestamps[dated], self.granularity), return_inverse=True)
+        batch_counts = np.zeros((len(starts), len(LABEL_IDS)), dtype=np.int64)
+        np.add.at(batch_counts, (bucket_of, np.searchsorted(LABEL_IDS, label_ids[dated])), 1)
+        self._merge_rows(starts, batch_counts)
+
+    def merge(self, histogram):
+        """Adds the counts of another histogram ({bucket start: counts}), re-bucketed to this granularity."""
+        if not histogram:
+            return
+        starts = bucket_starts(np.fromiter(histogram, dtype=np.int64, count=len(histogram)), self.granularity)
+        self._merge_rows(starts, np.array(list(histogram.values()), dtype=np.int64))
+
+    def _merge_rows(self, starts, counts):
+        for start, row in zip(starts.tolist(), counts):
+            existing = self._counts.get(start)
+            self._counts[start] = row.copy() if existing is None else existing + row
+
+    def histogram(self):
+        """{bucket start (Unix seconds): int64 counts in LABEL_IDS order}, oldest bucket first."""
+        return {start: self._counts[start] for start in sorted(self._counts)}
+
+    def buckets(self):
+        """The histogram as JSON-ready rows with per-label counts and percentages."""
+        rows = []
+        for start, counts in self.histogram().items():
+            total = int(counts.sum())
+            rows.append({
+                'start': time.strftime('%Y-%m-%d', time.gmtime(start)),
+                'total_sentences': total,
+                'counts': {LABEL_MAPPING[label_id]: int(counts[i]) for i, label_id in enumerate(LABEL_IDS)},
+                'percentages': {LABEL_MAPPING[label_id]: round(100.0 * int(counts[i]) / total, 2) if total else 0.0
+                                for i, label_id in enumerate(LABEL_IDS)},
+            })
+        return rows
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    n_sentences = 1_000_000
+    timestamps = rng.integers(1_700_000_000, 1_700_000_000 + 365 * SECONDS_PER_DAY, size=n_sentences)
+    label_ids = rng.choice(LABEL_IDS, size=n_sentences, p=[0.8, 0.15, 0.05])
+
+    aggregator = TrendAggregator('day')
+    start = time.perf_counter()
+    for batch_start in range(0, n_sentences, 10000):
+        aggregator.add(timestamps[batch_start:batch_start + 10000], label_ids[batch_start:batch_start + 10000])
+    elapsed = time.perf_counter() - start
+    weekly = TrendAggregator('week')
+    weekly.merge(aggregator.histogram())
+    print(f"{n_sentences} sentences -> {len(aggregator.histogram())} days / {len(weekly.histogram())} weeks "
+          f"in {elapsed:.3f}s ({n_sentences / elapsed:.0f} sentences/sec)")
+    print(weekly.buckets()[0])
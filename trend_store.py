@@ -0,0 +1,94 @@
+import os
+import sqlite3
+import sys
+import time
+import numpy as np
+
+from config import TREND_STORE_PATH
+from trend_aggregation import LABEL_IDS
+
+
+class TrendStore:
+    """
+    SQLite store of daily label counts per channel/group, plus a watermark per channel: the newest
+    message id already counted and the model version that classified it.
+    A repeat trend request only scrapes messages above the watermark and adds their counts to the
+    stored days, so refreshing a dashboard costs the new messages, not a full rescrape. Comments are
+    counted by their own date together with their message; replies that arrive later on an already
+    counted message are not picked up.
+    Like ResultCache, a connection is opened per operation so threads and gunicorn workers can share it.
+    """
+
+    def __init__(self, path=TREND_STORE_PATH):
+        self.path = path
+        store_dir = os.path.dirname(path)
+        if store_dir:
+            os.makedirs(store_dir, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS day_counts (channel TEXT NOT NULL, day_start INTEGER NOT NULL, "
+                         "label_id INTEGER NOT NULL, count INTEGER NOT NULL, PRIMARY KEY (channel, day_start, label_id))")
+            conn.execute("CREATE TABLE IF NOT EXISTS watermarks (channel TEXT PRIMARY KEY, newest_message_id INTEGER NOT NULL, "
+                         "model_version TEXT, messages_counted INTEGER NOT NULL, sentences_counted INTEGER NOT NULL, updated_at REAL NOT NULL)")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10)
+
+    def watermark(self, channel):
+        """Returns the channel's watermark dict, or None if nothing has been counted for it yet."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT newest_message_id, model_version, messages_counted, sentences_counted, updated_at "
+                               "FROM watermarks WHERE channel = ?", (channel,)).fetchone()
+        if row is None:
+            return None
+        return dict(zip(('newest_message_id', 'model_version', 'messages_counted', 'sentences_counted', 'updated_at'), row))
+
+    def add(self, channel, day_histogram, expected_message_id, newest_message_id, model_version, messages, sentences):
+        """
+        Adds daily counts ({day start: counts in LABEL_IDS order}) and moves the watermark to newest_message_id,
+        in one transaction. expected_message_id is the watermark the counts were scraped from (None for a
+        first request); if another request moved it meanwhile nothing is written, so no message is counted twice.
+        Returns True if the counts were stored.
+        """
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT newest_message_id FROM watermarks WHERE channel = ?", (channel,)).fetchone()
+            if (row[0] if row else None) != expected_message_id:
+                conn.rollback()
+                return False
+            conn.executemany(
+                "INSERT INTO day_counts (channel, day_start, label_id, count) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (channel, day_start, label_id) DO UPDATE SET count = count + excluded.count",
+                [(channel, int(day_start), label_id, int(count))
+                 for day_start, counts in day_histogram.items()
+                 for label_id, count in zip(LABEL_IDS, counts) if count])
+            conn.execute(
+                "INSERT INTO watermarks (channel, newest_message_id, model_version, messages_counted, sentences_counted, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (channel) DO UPDATE SET newest_message_id = excluded.newest_message_id, "
+                "model_version = excluded.model_version, messages_counted = messages_counted + excluded.messages_counted, "
+                "sentences_counted = sentences_counted + excluded.sentences_counted, updated_at = excluded.updated_at",
+                (channel, newest_message_id, model_version, messages, sentences, time.time()))
+            conn.commit()
+            return True
+        except sqlite3.Error as e:
+            conn.rollback()
+            print(f"Warning: trend store write failed for '{channel}': {e}", file=sys.stderr)
+            return False
+        finally:
+            conn.close()
+
+    def day_histogram(self, channel):
+        """{day start: int64 counts in LABEL_IDS order} for everything counted for the channel, oldest day first."""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT day_start, label_id, count FROM day_counts WHERE channel = ? ORDER BY day_start",
+                                (channel,)).fetchall()
+        histogram = {}
+        for day_start, label_id, count in rows:
+            histogram.setdefault(day_start, np.zeros(len(LABEL_IDS), dtype=np.int64))[LABEL_IDS.index(label_id)] = count
+        return histogram
+
+    def reset(self, channel):
+        """Forgets everything counted for the channel (e.g. after a model change)."""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM day_counts WHERE channel = ?", (channel,))
+            conn.execute("DELETE FROM watermarks WHERE channel = ?", (channel,))